@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from versatileimagefield.utils import get_resized_path
+
+AVATAR_SIZE = "32x32"
+RENDITION_CACHE_TTL = 60 * 60 * 24 * 30
+
+
+def _rendition_key(name: str) -> str:
+    return f"accounts:avatar-rendition:{name}"
+
+
+def resolve_urls(storage, names) -> dict:
+    """
+    Resolves names in one call when the storage supports it.
+    """
+    if hasattr(storage, "urls"):
+        return storage.urls(names)
+    return {name: storage.url(name) for name in names}
+
+
+def avatar_urls(users, size: str = AVATAR_SIZE) -> dict:
+    """
+    Maps the pk of every user with an avatar to the URL of its cropped
+    rendition. Load the users with select_related("profile"): no query is
+    made here and the storage is asked for every URL at once.
+    """
+    width, height = (int(side) for side in size.split("x"))
+    renditions = {}
+    crops = {}
+    for user in users:
+        try:
+            avatar = user.profile.avatar
+        except ObjectDoesNotExist:
+            continue
+        if not avatar:
+            continue
+        crop = avatar.crop
+        name = get_resized_path(
+            path_to_image=avatar.name,
+            width=width,
+            height=height,
+            filename_key=crop.get_filename_key(),
+            storage=crop.storage,
+        )
+        renditions[user.pk] = name
+        crops[name] = crop
+    if not crops:
+        return {}
+
+    # versatileimagefield checks the storage for the rendition on every
+    # access; remember the ones known to exist instead
+    known = cache.get_many([_rendition_key(name) for name in crops])
+    created = [name for name in crops if _rendition_key(name) not in known]
+    for name in created:
+        crops[name][size]
+    cache.set_many(
+        {_rendition_key(name): True for name in created}, RENDITION_CACHE_TTL
+    )
+
+    storage = next(iter(crops.values())).storage
+    urls = resolve_urls(storage, list(crops))
+    return {pk: urls.get(name) for pk, name in renditions.items()}
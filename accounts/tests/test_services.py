@@ -1,6 +1,17 @@
+import shutil
+import tempfile
+from io import BytesIO
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from accounts.services.avatar_service import avatar_urls
 from accounts.services.email_confirmation_service import EmailConfirmationService
 from accounts.services.token_service import account_activation_token
 
@@ -98,3 +109,53 @@ class TokenGeneratorTests(TestCase):
         token = account_activation_token.make_token(user)
         self.assertIsInstance(token, str)
         self.assertTrue(account_activation_token.check_token(user, token))
+
+
+class AvatarServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        storages = dict(settings.STORAGES)
+        storages["default"] = {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": media, "base_url": "/media/"},
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_user(self, username, avatar=True):
+        user = get_user_model().objects.create_user(username=username, password="p")
+        if avatar:
+            image = BytesIO()
+            Image.new("RGB", (64, 64), "red").save(image, "PNG")
+            user.profile.avatar.save(f"{username}.png", ContentFile(image.getvalue()))
+        return user
+
+    def test_urls_are_resolved_in_one_pass(self):
+        with_avatar = [self.make_user(f"u{i}") for i in range(3)]
+        self.make_user("plain", avatar=False)
+        self.make_user("no-profile", avatar=False).profile.delete()
+        users = list(get_user_model().objects.select_related("profile"))
+
+        with self.assertNumQueries(0):
+            urls = avatar_urls(users)
+        self.assertEqual(set(urls), {user.pk for user in with_avatar})
+        for url in urls.values():
+            self.assertRegex(url, r"^/media/__sized__/.*-crop-c.*-32x32\.png$")
+
+        # renditions known to exist are not looked up again
+        with (
+            patch.object(FileSystemStorage, "exists") as exists,
+            patch.object(
+                FileSystemStorage,
+                "urls",
+                create=True,
+                side_effect=lambda names: {name: name for name in names},
+            ) as bulk_urls,
+        ):
+            avatar_urls(users)
+        exists.assert_not_called()
+        bulk_urls.assert_called_once()
+        self.assertEqual(len(bulk_urls.call_args.args[0]), 3)
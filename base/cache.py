@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+# backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_shared(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    """
+    Whether every worker process reads and writes the same cache. Caching
+    that relies on cross-process invalidation or locks requires it.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import tempfile
+
+
+class DiskLRUCache:
+    """
+    Keeps blobs under directory, at most max_size bytes in total. A hit
+    touches the file's mtime, and the least recently used files are
+    evicted first.
+    """
+
+    def __init__(self, directory, max_size: int):
+        self.directory = str(directory)
+        self.max_size = max_size
+
+    def path(self, name: str) -> str:
+        digest = hashlib.sha256(name.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def get(self, name: str) -> str | None:
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, name: str, chunks) -> str:
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written aside and renamed, so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as temp:
+                for chunk in chunks:
+                    temp.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+        return path
+
+    def delete(self, name: str) -> None:
+        try:
+            os.unlink(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(".part"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
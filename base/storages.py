@@ -1,13 +1,37 @@
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
 
 from dropbox.exceptions import ApiError
 from storages.backends.dropbox import DropboxStorage
-from storages.utils import safe_join
+from storages.utils import safe_join, setting
 from django.core.cache import cache
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from base.media_cache import DiskLRUCache
+
+refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dropbox-links")
 
 
 class WindowsCompatibleDropboxStorage(DropboxStorage):
+    """
+    Caches Dropbox temporary links in Django's cache and refreshes them in
+    the background before they expire.
+
+    The refresh lock is a cache.add(), so it only keeps other processes
+    from refreshing the same link through a shared cache (see REDIS_URL in
+    settings). With a process-local cache each process refreshes on its own.
+    """
+
+    # temporary links are valid for four hours; past REFRESH_AFTER a cached
+    # link is still served while one worker fetches a new one
     CACHE_TTL = 60 * 60 * 4 - 30
+    REFRESH_AFTER = 60 * 60 * 3
+    NEGATIVE_TTL = 60 * 5
+    LOCK_TTL = 30
+    URL_WORKERS = 8
 
     def _full_path(self, name):
         if name == "/":
@@ -20,17 +44,132 @@ class WindowsCompatibleDropboxStorage(DropboxStorage):
 
     @staticmethod
     def _get_cache_key(name: str) -> str:
-        return f"dropbox:media:{name}"
+        return f"dropbox:link:{name}"
+
+    @staticmethod
+    def _get_lock_key(name: str) -> str:
+        return f"dropbox:link-refresh:{name}"
+
+    def _get_temporary_link(self, name):
+        try:
+            return self.client.files_get_temporary_link(self._full_path(name)).link
+        except ApiError:
+            return None
+
+    def _make_entry(self, link) -> tuple:
+        """
+        Cache entries are (link, refresh_at); a None link records an
+        ApiError for NEGATIVE_TTL seconds.
+        """
+        if link is None:
+            return (None, None), self.NEGATIVE_TTL
+        return (link, time.time() + self.REFRESH_AFTER), self.CACHE_TTL
+
+    def _store(self, links: dict) -> None:
+        by_timeout = {}
+        for name, link in links.items():
+            entry, timeout = self._make_entry(link)
+            by_timeout.setdefault(timeout, {})[self._get_cache_key(name)] = entry
+        for timeout, entries in by_timeout.items():
+            cache.set_many(entries, timeout)
+
+    def _refresh(self, name) -> None:
+        try:
+            self._store({name: self._get_temporary_link(name)})
+        finally:
+            cache.delete(self._get_lock_key(name))
+
+    def _refresh_in_background(self, name) -> Future | None:
+        # single flight: whoever adds the lock refreshes, the rest keep
+        # serving the stale link; across processes only with a shared cache
+        if cache.add(self._get_lock_key(name), True, self.LOCK_TTL):
+            return refresh_pool.submit(self._refresh, name)
+        return None
+
+    def _read(self, name, entry):
+        link, refresh_at = entry
+        if link is not None and refresh_at <= time.time():
+            self._refresh_in_background(name)
+        return link
+
+    def url(self, name):
+        if (entry := cache.get(self._get_cache_key(name))) is not None:
+            return self._read(name, entry)
+
+        link = self._get_temporary_link(name)
+        self._store({name: link})
+        return link
+
+    def urls(self, names) -> dict:
+        """
+        Like url() for many names: the cache is read and filled in bulk and
+        links missing from it are fetched concurrently, by at most
+        URL_WORKERS threads.
+        """
+        keys = {name: self._get_cache_key(name) for name in names}
+        cached = cache.get_many(keys.values())
+        links = {
+            name: self._read(name, cached[key])
+            for name, key in keys.items()
+            if key in cached
+        }
+
+        missing = [name for name in keys if name not in links]
+        if not missing:
+            return links
+        with ThreadPoolExecutor(min(self.URL_WORKERS, len(missing))) as pool:
+            fetched = dict(zip(missing, pool.map(self._get_temporary_link, missing)))
+        self._store(fetched)
+        links.update(fetched)
+        return links
+
+
+class LocalCacheDropboxStorage(WindowsCompatibleDropboxStorage):
+    """
+    Points media URLs at the media-cache view, which serves blobs from a
+    local DiskLRUCache and downloads them from Dropbox on a miss.
+    """
+
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    def get_default_settings(self):
+        return {
+            **super().get_default_settings(),
+            "cache_dir": setting("MEDIA_CACHE_DIR"),
+            "cache_max_size": setting("MEDIA_CACHE_MAX_SIZE", 512 * 1024 * 1024),
+        }
+
+    @cached_property
+    def disk_cache(self) -> DiskLRUCache:
+        return DiskLRUCache(self.cache_dir, self.cache_max_size)
 
     def url(self, name):
-        cache_key = self._get_cache_key(name)
-        if link := cache.get(cache_key):
-            return link
+        return reverse("media-cache", args=(name,))
 
+    def urls(self, names) -> dict:
+        return {name: self.url(name) for name in names}
+
+    def remote_url(self, name):
+        return super().url(name)
+
+    def cached_path(self, name) -> str | None:
+        """
+        Returns the path of the local copy of name, downloading it first on
+        a miss. None when Dropbox does not have it or it is too big to keep.
+        """
+        if (path := self.disk_cache.get(name)) is not None:
+            return path
         try:
-            res = self.client.files_get_temporary_link(self._full_path(name))
-            link = res.link
-            cache.set(cache_key, link, self.CACHE_TTL)
-            return link
+            metadata, response = self.client.files_download(self._full_path(name))
         except ApiError:
             return None
+        with closing(response):
+            if metadata.size > self.disk_cache.max_size:
+                return None
+            return self.disk_cache.put(
+                name, response.iter_content(self.DOWNLOAD_CHUNK_SIZE)
+            )
+
+    def delete(self, name):
+        super().delete(name)
+        self.disk_cache.delete(name)
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import storages
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from base.media_cache import DiskLRUCache
+from base.storages import LocalCacheDropboxStorage
+from base.tests.test_storages import FakeDropboxClient
+from base.views import parse_range
+
+
+class DiskLRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_least_recently_used_blobs_are_evicted(self):
+        disk_cache = DiskLRUCache(self.directory, max_size=30)
+        for age, name in enumerate(("a", "b", "c")):
+            path = disk_cache.put(name, [b"x" * 10])
+            os.utime(path, (age, age))
+        self.assertIsNotNone(disk_cache.get("a"))
+
+        disk_cache.put("d", [b"x" * 5, b"x" * 5])
+        self.assertIsNone(disk_cache.get("b"))
+        for name in ("a", "c", "d"):
+            with open(disk_cache.get(name), "rb") as blob:
+                self.assertEqual(blob.read(), b"x" * 10)
+
+        disk_cache.delete("a")
+        disk_cache.delete("a")
+        self.assertIsNone(disk_cache.get("a"))
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-200", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+        for header in ("", "bytes=0-1,5-6", "items=0-1", "bytes=-"):
+            self.assertIsNone(parse_range(header, 100))
+        for header in ("bytes=100-", "bytes=5-4", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                parse_range(header, 100)
+
+
+class CachedMediaViewTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(
+            STORAGES={
+                "default": {
+                    "BACKEND": "base.storages.LocalCacheDropboxStorage",
+                    "OPTIONS": {
+                        "oauth2_access_token": "token",
+                        "root_path": "/media",
+                        "cache_dir": directory,
+                        "cache_max_size": 2048,
+                    },
+                },
+                "staticfiles": {
+                    "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+                },
+            }
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.storage = storages["default"]
+        self.client_files = FakeDropboxClient(
+            {"media/avatars/a.png": self.content, "media/big.bin": b"x" * 4096}
+        )
+        self.storage.client = self.client_files
+        self.client.force_login(
+            get_user_model().objects.create_user(username="member", password="p")
+        )
+
+    def test_media_requires_login(self):
+        self.client.logout()
+        url = self.storage.url("avatars/a.png")
+        response = self.client.get(url)
+        self.assertRedirects(
+            response,
+            f"{reverse('accounts:login')}?next={url}",
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(self.client_files.downloads, [])
+
+    def test_media_is_downloaded_once_and_served_from_disk(self):
+        url = self.storage.url("avatars/a.png")
+        self.assertEqual(url, reverse("media-cache", args=("avatars/a.png",)))
+        self.assertEqual(self.storage.urls(["avatars/a.png"]), {"avatars/a.png": url})
+
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(self.client_files.downloads, ["media/avatars/a.png"])
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(
+            response["Cache-Control"], "private, max-age=31536000, immutable"
+        )
+
+    def test_ranges_are_served_partially(self):
+        url = self.storage.url("avatars/a.png")
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+    def test_misses_fall_back_to_dropbox(self):
+        # too big to keep on disk
+        response = self.client.get(self.storage.url("big.bin"))
+        self.assertRedirects(
+            response,
+            "https://dl.example.com/media/big.bin",
+            fetch_redirect_response=False,
+        )
+
+        response = self.client.get(self.storage.url("missing.bin"))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,191 @@
+import runpy
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils.module_loading import import_string
+from dropbox.exceptions import ApiError
+
+from base.storages import LocalCacheDropboxStorage, WindowsCompatibleDropboxStorage
+
+
+class FakeDropboxClient:
+    """
+    Answers files_get_temporary_link and files_download for the paths in
+    files, a mapping of path to content or just the paths. Records the
+    calls and how many link requests ran at the same time.
+    """
+
+    def __init__(self, files, delay=0.0):
+        self.files = files if isinstance(files, dict) else dict.fromkeys(files, b"")
+        self.delay = delay
+        self.calls = []
+        self.downloads = []
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def files_get_temporary_link(self, path):
+        with self.lock:
+            self.calls.append(path)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if path not in self.files:
+                raise ApiError("request-id", "path/not_found", None, None)
+            return SimpleNamespace(link=f"https://dl.example.com/{path.lstrip('/')}")
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def files_download(self, path):
+        self.downloads.append(path)
+        if path not in self.files:
+            raise ApiError("request-id", "path/not_found", None, None)
+        content = self.files[path]
+        response = SimpleNamespace(
+            iter_content=lambda size: (
+                content[i : i + size] for i in range(0, len(content), size)
+            ),
+            close=lambda: None,
+        )
+        return SimpleNamespace(size=len(content)), response
+
+
+class DropboxStorageTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.storage = WindowsCompatibleDropboxStorage(
+            oauth2_access_token="token", root_path="/media"
+        )
+
+    def use_client(self, names, **kwargs):
+        self.storage.client = FakeDropboxClient(
+            (self.storage._full_path(name) for name in names), **kwargs
+        )
+        return self.storage.client
+
+    def test_url_is_cached(self):
+        client = self.use_client(["a.png"])
+        self.assertEqual(
+            self.storage.url("a.png"), "https://dl.example.com/media/a.png"
+        )
+        self.assertEqual(
+            self.storage.url("a.png"), "https://dl.example.com/media/a.png"
+        )
+        self.assertEqual(len(client.calls), 1)
+        self.assertIsNone(self.storage.url("missing.png"))
+
+    def test_urls_fetches_only_what_the_cache_misses(self):
+        names = [f"avatar-{i}.png" for i in range(5)]
+        client = self.use_client(names)
+        self.storage.url(names[0])
+
+        links = self.storage.urls(names + ["missing.png"])
+        self.assertEqual(
+            links,
+            {
+                **{name: f"https://dl.example.com/media/{name}" for name in names},
+                "missing.png": None,
+            },
+        )
+        self.assertEqual(len(client.calls), 6)
+
+        client.calls.clear()
+        self.assertEqual(
+            self.storage.urls(names), {name: links[name] for name in names}
+        )
+        self.assertEqual(client.calls, [])
+        self.assertEqual(self.storage.urls([]), {})
+
+    def test_urls_fetches_concurrently_within_the_pool_bound(self):
+        names = [f"avatar-{i}.png" for i in range(20)]
+        client = self.use_client(names, delay=0.02)
+        links = self.storage.urls(names)
+        self.assertEqual(len(links), 20)
+        self.assertGreater(client.peak, 1)
+        self.assertLessEqual(client.peak, self.storage.URL_WORKERS)
+
+    def test_api_errors_are_cached_for_a_while(self):
+        client = self.use_client([])
+        self.assertIsNone(self.storage.url("missing.png"))
+        self.assertEqual(self.storage.urls(["missing.png"]), {"missing.png": None})
+        self.assertEqual(len(client.calls), 1)
+
+        later = time.time() + self.storage.NEGATIVE_TTL + 1
+        with patch("time.time", return_value=later):
+            self.assertIsNone(self.storage.url("missing.png"))
+        self.assertEqual(len(client.calls), 2)
+
+    def test_stale_links_are_served_while_one_refresh_runs(self):
+        client = self.use_client(["a.png"])
+        link = self.storage.url("a.png")
+        client.delay = 0.5
+
+        stale = time.time() + self.storage.REFRESH_AFTER + 1
+        refresh = self.storage._refresh_in_background
+        futures = []
+        with (
+            patch("time.time", return_value=stale),
+            patch.object(
+                self.storage,
+                "_refresh_in_background",
+                side_effect=lambda name: futures.append(refresh(name)),
+            ),
+        ):
+            for _ in range(5):
+                self.assertEqual(self.storage.url("a.png"), link)
+            self.assertEqual(self.storage.urls(["a.png"]), {"a.png": link})
+            started = [future for future in futures if future is not None]
+            self.assertEqual((len(futures), len(started)), (6, 1))
+            started[0].result()
+
+            self.assertEqual(len(client.calls), 2)
+            # the refreshed entry is fresh again
+            self.assertEqual(self.storage.url("a.png"), link)
+            self.assertEqual(len(client.calls), 2)
+
+
+class ProdStorageSettingsTests(SimpleTestCase):
+    ENVIRON = dict.fromkeys(
+        (
+            "SECRET_KEY",
+            "EMAIL_HOST",
+            "EMAIL_HOST_USER",
+            "EMAIL_HOST_PASSWORD",
+            "EMAIL_PORT",
+            "DROPBOX_OAUTH2_TOKEN",
+            "DROPBOX_OAUTH2_REFRESH_TOKEN",
+            "DROPBOX_APP_SECRET",
+            "DROPBOX_APP_KEY",
+            "POSTGRES_DB",
+            "POSTGRES_USER",
+            "POSTGRES_PASSWORD",
+            "POSTGRES_HOST",
+        ),
+        "x",
+    ) | {"POSTGRES_DB_PORT": "5432"}
+
+    def storage_backend(self, **environ):
+        # base is re-imported each time: it reads the environment once and
+        # prod changes its STORAGES in place
+        with (
+            patch.dict("os.environ", self.ENVIRON | environ),
+            patch.dict(sys.modules),
+        ):
+            sys.modules.pop("config.settings.base", None)
+            settings = runpy.run_module("config.settings.prod")
+        return import_string(settings["STORAGES"]["default"]["BACKEND"])
+
+    def test_prod_storage_caches_links(self):
+        backend = self.storage_backend(MEDIA_CACHE_DIR="")
+        self.assertTrue(issubclass(backend, WindowsCompatibleDropboxStorage))
+        self.assertTrue(callable(getattr(backend, "urls", None)))
+
+        backend = self.storage_backend(MEDIA_CACHE_DIR="/tmp/media-cache")
+        self.assertIs(backend, LocalCacheDropboxStorage)
@@ -0,0 +1,93 @@
+import mimetypes
+import os
+import re
+
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import storages
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_safe
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# private: only signed-in users may fetch media, so shared caches must not
+# keep it
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns the (first, last) byte positions of a single "bytes=" range,
+    or None when the whole file should be sent. Raises ValueError when the
+    range can not be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError("Range not satisfiable")
+    return first, last
+
+
+def _read_chunks(file, length: int):
+    with file:
+        while length > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@login_required
+@require_safe
+def serve_cached_media(request: HttpRequest, name: str) -> HttpResponse:
+    storage = storages["default"]
+    if not hasattr(storage, "cached_path"):
+        raise Http404("Media cache is not enabled")
+
+    path = storage.cached_path(name)
+    try:
+        file = open(path, "rb") if path is not None else None
+    except FileNotFoundError:
+        # evicted in the meantime
+        file = None
+    if file is None:
+        if link := storage.remote_url(name):
+            return HttpResponseRedirect(link)
+        raise Http404("No such media file")
+
+    size = os.fstat(file.fileno()).st_size
+    try:
+        byte_range = parse_range(request.headers.get("Range", ""), size)
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    first, last = byte_range or (0, size - 1)
+    file.seek(first)
+    response = StreamingHttpResponse(
+        _read_chunks(file, last - first + 1),
+        status=206 if byte_range else 200,
+        content_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+    )
+    if byte_range:
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response["Content-Length"] = str(last - first + 1)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -106,6 +106,23 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# CoveringUniqueConstraint keeps the unique part of the constraint on
+# backends without covering indexes, which models.W039 does not know
+SILENCED_SYSTEM_CHECKS = ["models.W039"]
+
+
+# the membership role cache and the Dropbox link refresh lock need a cache
+# that every worker shares; set REDIS_URL in any multi-process deployment.
+# Without it the membership cache stays off and each process refreshes
+# Dropbox links on its own
+if REDIS_URL := os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
 
 AUTH_USER_MODEL = "accounts.User"
 LOGIN_REDIRECT_URL = "flowdesk:index"
@@ -121,6 +138,11 @@ EMAIL_PORT = os.environ["EMAIL_PORT"]
 MEDIA_ROOT = BASE_DIR / "media/"
 MEDIA_URL = "media/"
 
+# set MEDIA_CACHE_DIR to serve media from a local disk cache in front of
+# Dropbox, see base.storages.LocalCacheDropboxStorage
+MEDIA_CACHE_DIR = os.environ.get("MEDIA_CACHE_DIR")
+MEDIA_CACHE_MAX_SIZE = int(os.environ.get("MEDIA_CACHE_MAX_SIZE", 512 * 1024 * 1024))
+
 STORAGES = {
     "default": {
         "BACKEND": "base.storages.WindowsCompatibleDropboxStorage",
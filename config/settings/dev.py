@@ -17,3 +17,6 @@ DATABASES = {
 
 # enabling dropbox windows support for development
 STORAGES["default"]["BACKEND"] = "base.storages.WindowsCompatibleDropboxStorage"
+
+if MEDIA_CACHE_DIR:
+    STORAGES["default"]["BACKEND"] = "base.storages.LocalCacheDropboxStorage"
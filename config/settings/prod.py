@@ -22,5 +22,8 @@ DATABASES = {
     }
 }
 
-# using default DropboxStorage class on prodaction
-STORAGES["default"]["BACKEND"] = "storages.backends.dropbox.DropboxStorage"
+# caches Dropbox temporary links, see base.storages
+STORAGES["default"]["BACKEND"] = "base.storages.WindowsCompatibleDropboxStorage"
+
+if MEDIA_CACHE_DIR:
+    STORAGES["default"]["BACKEND"] = "base.storages.LocalCacheDropboxStorage"
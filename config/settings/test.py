@@ -75,6 +75,11 @@ STATICFILES_DIRS = (BASE_DIR / "static",)
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# CoveringUniqueConstraint keeps the unique part of the constraint on
+# backends without covering indexes, which models.W039 does not know
+SILENCED_SYSTEM_CHECKS = ["models.W039"]
+
 AUTH_USER_MODEL = "accounts.User"
 LOGIN_REDIRECT_URL = "flowdesk:index"
 
@@ -91,6 +96,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": str(BASE_DIR / "test_db.sqlite3"),
+        # a file rather than the in-memory default, so threaded tests can
+        # open their own connections
+        "TEST": {"NAME": str(BASE_DIR / "test_db_test.sqlite3")},
     }
 }
 
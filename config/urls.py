@@ -3,9 +3,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from base.views import serve_cached_media
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("flowdesk.urls", namespace="flowdesk")),
     path("accounts/", include("accounts.urls", namespace="accounts")),
+    path("media-cache/<path:name>", serve_cached_media, name="media-cache"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
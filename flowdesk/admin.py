@@ -3,6 +3,19 @@ from django.contrib import admin
 from flowdesk.models import WorkspaceMember, Workspace, Board, List, Tag, Task, Comment
 
 
+class MinimumRoleFilter(admin.SimpleListFilter):
+    title = "minimum role"
+    parameter_name = "min_role"
+
+    def lookups(self, request, model_admin):
+        return list(reversed(WorkspaceMember.Roles.choices))
+
+    def queryset(self, request, queryset):
+        if self.value() in WorkspaceMember.ROLE_RANKS:
+            return queryset.with_role_at_least(self.value())
+        return queryset
+
+
 @admin.register(WorkspaceMember)
 class WorkspaceMemberAdmin(admin.ModelAdmin):
     list_display = (
@@ -10,6 +23,7 @@ class WorkspaceMemberAdmin(admin.ModelAdmin):
         "workspace",
         "role",
     )
+    list_filter = (MinimumRoleFilter,)
 
 
 @admin.register(Workspace)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FlowdeskConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "flowdesk"
+
+    def ready(self):
+        from . import signals
@@ -1,9 +1,13 @@
 from django.http import HttpRequest
 
-from flowdesk.models import Workspace
+from flowdesk.services.workspace_access import get_user_memberships
 
 
 def user_workspaces(request: HttpRequest) -> dict:
     if request.user.is_authenticated:
-        return {"user_workspaces": Workspace.objects.filter(members=request.user)}
+        return {
+            "user_workspaces": [
+                membership.workspace for membership in get_user_memberships(request)
+            ]
+        }
     return {"user_workspaces": []}
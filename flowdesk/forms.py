@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.forms import modelformset_factory
 
 from flowdesk.models import Workspace, Board, List, Task, Tag, Comment, WorkspaceMember
+from flowdesk.services import dependency_closure
 
 User = get_user_model()
 
@@ -64,6 +65,24 @@ class TaskForm(forms.ModelForm):
                 queryset = queryset.exclude(pk=task.pk)
             self.fields["blocking_tasks"].queryset = queryset
 
+    def clean(self):
+        cleaned_data = super().clean()
+        blockers = cleaned_data.get("blocking_tasks")
+        if self.instance.pk and blockers:
+            blocked = dependency_closure.cycle_forming_ids(
+                self.instance.pk, [blocker.pk for blocker in blockers]
+            )
+            if blocked:
+                titles = ", ".join(
+                    blocker.title for blocker in blockers if blocker.pk in blocked
+                )
+                self.add_error(
+                    "blocking_tasks",
+                    f"These tasks already wait on this one, directly or "
+                    f"through other tasks: {titles}.",
+                )
+        return cleaned_data
+
 
 class TagForm(forms.ModelForm):
     class Meta:
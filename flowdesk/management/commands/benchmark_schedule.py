@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from flowdesk.models import Board, List, Task, Workspace
+from flowdesk.services.schedule import build_schedule, load_board_graph
+
+
+class Command(BaseCommand):
+    help = (
+        "Times loading, building and scheduling the dependency graph of a "
+        "generated board. The board is created in a transaction that is "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--edges", type=int, default=50000)
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=100,
+            help="Fail when the fastest run takes longer, in milliseconds.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            board = self.make_board(options["tasks"], options["edges"])
+            timings = []
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                graph = load_board_graph(board)
+                loaded = time.perf_counter()
+                schedule = build_schedule(graph)
+                timings.append((time.perf_counter() - started, loaded - started))
+            transaction.set_rollback(True)
+
+        if len(schedule.order) != options["tasks"]:
+            raise CommandError(f"Scheduled {len(schedule.order)} tasks.")
+        total, load = (seconds * 1000 for seconds in min(timings))
+        self.stdout.write(
+            f"{options['tasks']} tasks, {options['edges']} edges: {total:.1f} ms "
+            f"({load:.1f} ms loading and building, {total - load:.1f} ms scheduling)"
+        )
+        if total > options["budget"]:
+            raise CommandError(f"Over the {options['budget']:g} ms budget.")
+
+    def make_board(self, task_count: int, edge_count: int) -> Board:
+        if edge_count > task_count * (task_count - 1) // 2:
+            raise CommandError("Too many edges for an acyclic graph.")
+        rng = random.Random(7)
+        user = get_user_model().objects.create_user(username="benchmark-schedule")
+        workspace = Workspace.objects.create(name="Benchmark")
+        board = Board.objects.create(name="Benchmark", workspace=workspace)
+        lst = List.objects.create(name="Benchmark", board=board, position=0)
+        tasks = Task.objects.bulk_create(
+            (
+                Task(
+                    title=f"T{i}",
+                    list=lst,
+                    created_by=user,
+                    position=i,
+                    priority=rng.choice(Task.Priority.values),
+                )
+                for i in range(task_count)
+            ),
+            batch_size=1000,
+        )
+
+        # edges only point forwards, so the graph stays acyclic
+        edges = set()
+        while len(edges) < edge_count:
+            blocker, blocked = rng.randrange(task_count), rng.randrange(task_count)
+            if blocker < blocked:
+                edges.add((blocker, blocked))
+        Dependency = Task.blocking_tasks.through
+        Dependency.objects.bulk_create(
+            (
+                Dependency(from_task=tasks[blocked], to_task=tasks[blocker])
+                for blocker, blocked in edges
+            ),
+            batch_size=1000,
+        )
+        return board
@@ -0,0 +1,81 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from flowdesk.models import Board, List, Task, Workspace
+from flowdesk.services.task_graph import BLOCKED, GraphQuery, build_task_graph
+
+
+class Command(BaseCommand):
+    help = (
+        "Times building the whole graph of a dependency chain at two sizes, "
+        "to check the build grows linearly. The chains are created in a "
+        "transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs=2, default=(5000, 10000))
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument(
+            "--max-ratio",
+            type=float,
+            default=3,
+            help="Fail when the larger build takes more than this many times as "
+            "long as the smaller one.",
+        )
+
+    def handle(self, *args, **options):
+        small, large = options["sizes"]
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username="benchmark-graph")
+            workspace = Workspace.objects.create(name="Benchmark")
+            board = Board.objects.create(name="Benchmark", workspace=workspace)
+            lst = List.objects.create(name="Benchmark", board=board, position=0)
+            timings = {
+                count: self.time_chain(lst, user, count, options["runs"])
+                for count in (small, large)
+            }
+            transaction.set_rollback(True)
+
+        ratio = timings[large] / timings[small]
+        for count, seconds in timings.items():
+            self.stdout.write(f"{count} tasks: {seconds * 1000:.1f} ms")
+        # a linear build takes about twice as long for twice the tasks, a
+        # quadratic one about four times
+        self.stdout.write(f"ratio: {ratio:.2f}")
+        if ratio > options["max_ratio"]:
+            raise CommandError(f"Over the {options['max_ratio']:g} ratio.")
+
+    def time_chain(self, lst: List, user, count: int, runs: int) -> float:
+        Task.objects.filter(list=lst).delete()
+        tasks = Task.objects.bulk_create(
+            (
+                Task(title=f"T{i}", list=lst, created_by=user, position=i)
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+        Dependency = Task.blocking_tasks.through
+        Dependency.objects.bulk_create(
+            (
+                Dependency(from_task=blocked, to_task=blocker)
+                for blocker, blocked in zip(tasks, tasks[1:])
+            ),
+            batch_size=1000,
+        )
+
+        # the whole component, past the bounds the views clamp queries to
+        query = GraphQuery(depth=count, limit=count, direction=BLOCKED)
+        queryset = Task.objects.filter(list=lst)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = build_task_graph(
+                tasks[0], queryset, lst.board.workspace_id, lst.board_id, query, count
+            )
+            timings.append(time.perf_counter() - started)
+        if len(result["nodes"]) != count or len(result["edges"]) != count - 1:
+            raise CommandError(f"Built {len(result['nodes'])} of {count} nodes.")
+        return min(timings)
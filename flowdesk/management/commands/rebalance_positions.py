@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from flowdesk.models import Board, List, Task
+from flowdesk.services.ordering import rebalance, sync_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Spreads list and task positions POSITION_GAP apart again and resets "
+        "the position counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--board", type=int, action="append", help="Only rebalance these boards."
+        )
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+        if options["board"]:
+            boards = boards.filter(pk__in=options["board"])
+
+        written = 0
+        for board in boards.iterator():
+            written += rebalance(List.objects.filter(board=board))
+            for list_id in board.lists.values_list("pk", flat=True):
+                written += rebalance(Task.objects.filter(list_id=list_id))
+        sync_counters(boards)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {written} positions."))
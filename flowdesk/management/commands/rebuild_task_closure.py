@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from flowdesk.services.dependency_closure import refresh
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the transitive closure of task dependencies from scratch."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = refresh()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} closure rows."))
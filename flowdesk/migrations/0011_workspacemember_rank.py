@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+ROLE_RANKS = {
+    "GUEST": 10,
+    "USER": 20,
+    "ADMIN": 30,
+    "OWNER": 40,
+}
+
+
+def fill_member_ranks(apps, schema_editor):
+    WorkspaceMember = apps.get_model("flowdesk", "WorkspaceMember")
+    for role, rank in ROLE_RANKS.items():
+        WorkspaceMember.objects.filter(role=role).update(rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0001_squashed_0010_workspacemember_created_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workspacemember",
+            name="rank",
+            field=models.PositiveSmallIntegerField(
+                db_index=True, default=10, editable=False
+            ),
+        ),
+        migrations.RunPython(fill_member_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_members(apps, schema_editor):
+    WorkspaceMember = apps.get_model("flowdesk", "WorkspaceMember")
+    duplicates = (
+        WorkspaceMember.objects.values("user_id", "workspace_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        # keep the most privileged membership, then the oldest one
+        memberships = WorkspaceMember.objects.filter(
+            user_id=duplicate["user_id"], workspace_id=duplicate["workspace_id"]
+        ).order_by("-rank", "id")
+        keep = memberships.first()
+        memberships.exclude(pk=keep.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0011_workspacemember_rank"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_members, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="workspacemember",
+            constraint=models.UniqueConstraint(
+                fields=("user", "workspace"), name="user_workspace_unique_constraint"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workspacemember",
+            index=models.Index(
+                fields=["user", "workspace"],
+                include=("role", "rank"),
+                name="user_workspace_role_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="workspacemember",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="workspace_memberships",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0012_workspacemember_unique_user_workspace"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["list", "position", "id"], name="task_list_position_idx"
+            ),
+        ),
+    ]
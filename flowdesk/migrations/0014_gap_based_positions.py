@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+POSITION_GAP = 1 << 16
+
+
+def renumber_positions(apps, position_for):
+    for model_name, parent in (("List", "board_id"), ("Task", "list_id")):
+        model = apps.get_model("flowdesk", model_name)
+        changed = []
+        last_parent, index = None, 0
+        for obj in model.objects.order_by(parent, "position", "pk").only(
+            "id", parent, "position"
+        ):
+            if getattr(obj, parent) != last_parent:
+                last_parent, index = getattr(obj, parent), 0
+            obj.position = position_for(index)
+            index += 1
+            changed.append(obj)
+        model.objects.bulk_update(changed, ["position"], batch_size=500)
+
+
+def spread_positions(apps, schema_editor):
+    renumber_positions(apps, lambda index: (index + 1) * POSITION_GAP)
+
+
+def compact_positions(apps, schema_editor):
+    renumber_positions(apps, lambda index: index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0013_task_list_position_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="list",
+            name="position",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="position",
+            field=models.BigIntegerField(),
+        ),
+        migrations.RunPython(spread_positions, compact_positions),
+    ]
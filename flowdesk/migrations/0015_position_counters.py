@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:07
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    for parent_name, child_name, field in (
+        ("Board", "List", "last_list_position"),
+        ("List", "Task", "last_task_position"),
+    ):
+        parent = apps.get_model("flowdesk", parent_name)
+        child = apps.get_model("flowdesk", child_name)
+        last = (
+            child.objects.filter(**{parent_name.lower(): OuterRef("pk")})
+            .values(parent_name.lower())
+            .annotate(last=Max("position"))
+            .values("last")
+        )
+        parent.objects.update(**{field: Coalesce(Subquery(last), Value(0))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0014_gap_based_positions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="last_list_position",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="list",
+            name="last_task_position",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FILL_CLOSURE_SQL = """
+INSERT INTO flowdesk_taskdependencyclosure (ancestor_id, descendant_id)
+WITH RECURSIVE up(descendant, ancestor) AS (
+    SELECT from_task_id, to_task_id FROM flowdesk_task_blocking_tasks
+    UNION
+    SELECT up.descendant, dep.to_task_id
+    FROM up JOIN flowdesk_task_blocking_tasks dep ON dep.from_task_id = up.ancestor
+)
+SELECT ancestor, descendant FROM up
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0016_board_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskDependencyClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="flowdesk.task",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="flowdesk.task",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "ancestor"],
+                        name="task_closure_descendant_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"), name="task_closure_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(FILL_CLOSURE_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0017_task_dependency_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="graph_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0018_board_graph_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="comment",
+            options={"ordering": ("-created_at", "-id")},
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["task", "-created_at", "-id"], name="comment_task_created_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="task",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="flowdesk.task",
+            ),
+        ),
+    ]
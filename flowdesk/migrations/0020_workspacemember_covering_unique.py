@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:45
+
+import flowdesk.models
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0019_comment_task_created_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="workspacemember",
+            name="user_workspace_unique_constraint",
+        ),
+        migrations.RemoveIndex(
+            model_name="workspacemember",
+            name="user_workspace_role_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="workspacemember",
+            constraint=flowdesk.models.CoveringUniqueConstraint(
+                fields=("user", "workspace"),
+                include=("role", "rank"),
+                name="user_workspace_unique_constraint",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0020_workspacemember_covering_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="list",
+            name="order_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:07
+
+import flowdesk.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flowdesk", "0021_list_order_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # a column can not be turned into a generated one in place, and the
+    # constraint covers it, so both are dropped and created again
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="workspacemember",
+            name="user_workspace_unique_constraint",
+        ),
+        migrations.RemoveField(
+            model_name="workspacemember",
+            name="rank",
+        ),
+        migrations.AddField(
+            model_name="workspacemember",
+            name="rank",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(role="GUEST", then=models.Value(10)),
+                    models.When(role="USER", then=models.Value(20)),
+                    models.When(role="ADMIN", then=models.Value(30)),
+                    models.When(role="OWNER", then=models.Value(40)),
+                    default=models.Value(0),
+                ),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="workspacemember",
+            constraint=flowdesk.models.CoveringUniqueConstraint(
+                fields=("user", "workspace"),
+                include=("role", "rank"),
+                name="user_workspace_unique_constraint",
+            ),
+        ),
+    ]
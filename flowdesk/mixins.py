@@ -1,8 +1,11 @@
-from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied
-from flowdesk.models import Workspace, Board, List, Task, Tag
+from flowdesk.models import Board, List, Task, Tag
 
 from flowdesk.models import WorkspaceMember
+from flowdesk.services.workspace_access import (
+    get_member_role,
+    resolve_workspace_access,
+)
 
 
 class RoleRequiredMixin:
@@ -13,26 +16,18 @@ class RoleRequiredMixin:
         workspace = getattr(self, self.workspace_attr, None)
         if not workspace:
             raise PermissionDenied("Workspace not found for role check.")
-        try:
-            member = WorkspaceMember.objects.get(user=request.user, workspace=workspace)
-        except WorkspaceMember.DoesNotExist:
-            raise PermissionDenied("You are not a member of this workspace.")
-        if not self.has_required_role(member.role):
+        # without a role loaded earlier in the request this is one rank
+        # filter query, which answers None for members below required_role
+        role = get_member_role(request, workspace, required=self.required_role)
+        if role is None or not self.has_required_role(role):
             raise PermissionDenied(
                 f"You must have at least {self.required_role} role to perform this action."
             )
         return super().dispatch(request, *args, **kwargs)
 
     def has_required_role(self, user_role):
-        hierarchy = [
-            WorkspaceMember.Roles.GUEST,
-            WorkspaceMember.Roles.USER,
-            WorkspaceMember.Roles.ADMIN,
-            WorkspaceMember.Roles.OWNER,
-        ]
-        required_idx = hierarchy.index(self.required_role)
-        user_idx = hierarchy.index(user_role)
-        return user_idx >= required_idx
+        ranks = WorkspaceMember.ROLE_RANKS
+        return ranks[user_role] >= ranks[self.required_role]
 
 
 class OwnerRequiredMixin(RoleRequiredMixin):
@@ -53,45 +48,31 @@ class GuestRequiredMixin(RoleRequiredMixin):
 
 class WorkspaceAccessMixin:
     workspace_lookup_url_kwarg = "workspace_pk"
+    object_lookup_kwargs = {
+        Board: "board_pk",
+        List: "list_pk",
+        Task: "task_pk",
+        Tag: "tag_pk",
+    }
+
+    def get_access_lookup(self, kwargs) -> dict:
+        lookup = {
+            "workspace_pk": kwargs.get(self.workspace_lookup_url_kwarg)
+            or kwargs.get("pk"),
+            "board_pk": kwargs.get("board_pk"),
+            "list_pk": kwargs.get("list_pk"),
+            "task_pk": kwargs.get("task_pk"),
+        }
+        model = getattr(self, "model", None)
+        if "pk" in kwargs and model in self.object_lookup_kwargs:
+            lookup[self.object_lookup_kwargs[model]] = kwargs["pk"]
+        return lookup
 
     def dispatch(self, request, *args, **kwargs):
-        workspace_pk = kwargs.get(self.workspace_lookup_url_kwarg) or kwargs.get("pk")
-        workspace = get_object_or_404(Workspace, pk=workspace_pk)
-
-        if not workspace.members.filter(pk=request.user.pk).exists():
-            raise PermissionDenied("You do not have access to this workspace")
-
-        if "board_pk" in kwargs:
-            board = get_object_or_404(Board, pk=kwargs["board_pk"])
-            self.board = board
-            if board.workspace_id != workspace.pk:
-                raise PermissionDenied("This board does not belong to the workspace")
-
-        if "list_pk" in kwargs:
-            lst = get_object_or_404(List, pk=kwargs["list_pk"])
-            self.list = lst
-            if lst.board.workspace_id != workspace.pk:
-                raise PermissionDenied("This list does not belong to the workspace")
-
-        if "task_pk" in kwargs:
-            task = get_object_or_404(Task, pk=kwargs["task_pk"])
-            self.task = task
-            if task.list.board.workspace_id != workspace.pk:
-                raise PermissionDenied("This task does not belong to the workspace")
-
-        if "pk" in kwargs and self.model in [Board, List, Task, Tag]:
-            obj = get_object_or_404(self.model, pk=kwargs["pk"])
-            related_ws = (
-                obj.workspace_id
-                if isinstance(obj, (Board, Tag))
-                else (
-                    obj.board.workspace_id
-                    if isinstance(obj, List)
-                    else obj.list.board.workspace_id if isinstance(obj, Task) else None
-                )
-            )
-            if related_ws and related_ws != workspace.pk:
-                raise PermissionDenied("This object does not belong to the workspace")
+        access = resolve_workspace_access(request, **self.get_access_lookup(kwargs))
 
-        self.workspace = workspace
+        self.workspace = access.workspace
+        for attr in ("board", "list", "task"):
+            if getattr(access, attr) is not None:
+                setattr(self, attr, getattr(access, attr))
         return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,140 @@
+import json
+
+from django.core.cache import cache
+
+from flowdesk.models import Board, Task
+from flowdesk.services import schedule
+from flowdesk.services.url_templates import reverse_template
+
+LAYER_SPACING = 250
+NODE_SPACING = 120
+LAYOUT_CACHE_TTL = 60 * 60 * 24
+STREAM_CHUNK_SIZE = 500
+# a response carries at most this many nodes and edges, the rest is paged
+PAGE_NODES = 2000
+PAGE_EDGES = 5000
+
+
+def _layers(graph: schedule.DependencyGraph) -> list[list[int]]:
+    """
+    Puts every task one layer right of its furthest blocker, then orders
+    each layer by the mean position of the blockers to cut down crossings.
+    Tasks on a cycle get a layer of their own after the rest.
+    """
+    order, cyclic = schedule.topological_order(graph)
+    offsets, targets = graph.offsets.tolist(), graph.targets.tolist()
+    layer = [0] * len(graph)
+    predecessors = [[] for _ in range(len(graph))]
+    for node in order:
+        for target in targets[offsets[node] : offsets[node + 1]]:
+            predecessors[target].append(node)
+            if layer[node] + 1 > layer[target]:
+                layer[target] = layer[node] + 1
+
+    layers = [[] for _ in range(max((layer[i] for i in order), default=-1) + 1)]
+    for node in order:
+        layers[layer[node]].append(node)
+    if cyclic:
+        layers.append(cyclic)
+
+    position = [0.0] * len(graph)
+    for nodes in layers:
+        nodes.sort(
+            key=lambda node: (
+                sum(position[p] for p in predecessors[node]) / len(predecessors[node])
+                if predecessors[node]
+                else 0.0
+            )
+        )
+        for index, node in enumerate(nodes):
+            position[node] = index
+    return layers
+
+
+def build_board_layout(board: Board) -> dict:
+    """
+    Lays out every task of the board that blocks or waits on another one.
+    """
+    edges = list(
+        Task.blocking_tasks.through.objects.filter(
+            from_task__list__board=board, to_task__list__board=board
+        ).values_list("to_task_id", "from_task_id")
+    )
+    linked = {task_id for edge in edges for task_id in edge}
+    tasks = {
+        task_id: (title, list_id, list_name)
+        for task_id, title, list_id, list_name in Task.objects.filter(pk__in=linked)
+        .order_by()
+        .values_list("id", "title", "list_id", "list__name")
+    }
+    graph = schedule.build_graph(
+        ((task_id, None, None, None) for task_id in sorted(tasks)), edges
+    )
+    task_url = reverse_template(
+        "flowdesk:task-detail", (board.workspace_id, board.pk, None, None)
+    )
+
+    nodes = []
+    for column, layer in enumerate(_layers(graph)):
+        top = (len(layer) - 1) / 2
+        for row, node in enumerate(layer):
+            task_id = graph.ids[node]
+            title, list_id, list_name = tasks[task_id]
+            nodes.append(
+                {
+                    "id": task_id,
+                    "label": title,
+                    "title": f"from list: {list_name}",
+                    "group": "related",
+                    "url": task_url.format(list_id, task_id),
+                    "x": column * LAYER_SPACING,
+                    "y": round((row - top) * NODE_SPACING),
+                }
+            )
+    return {
+        "nodes": nodes,
+        "edges": [{"from": blocker, "to": blocked} for blocker, blocked in edges],
+    }
+
+
+def layout_etag(board: Board, page: int = 0) -> str:
+    return f'"board-graph-{board.pk}-{board.graph_version}-{page}"'
+
+
+def get_board_layout(board: Board) -> dict:
+    key = f"flowdesk:board-layout:{board.pk}:{board.graph_version}"
+    layout = cache.get(key)
+    if layout is None:
+        layout = build_board_layout(board)
+        cache.set(key, layout, LAYOUT_CACHE_TTL)
+    return layout
+
+
+def layout_page(layout: dict, page: int) -> dict:
+    """
+    The page-th slice of PAGE_NODES nodes and PAGE_EDGES edges; "next" is
+    the following page while either list has more.
+    """
+    nodes, edges = layout["nodes"], layout["edges"]
+    more = (page + 1) * PAGE_NODES < len(nodes) or (page + 1) * PAGE_EDGES < len(edges)
+    return {
+        "nodes": nodes[page * PAGE_NODES : (page + 1) * PAGE_NODES],
+        "edges": edges[page * PAGE_EDGES : (page + 1) * PAGE_EDGES],
+        "next": page + 1 if more else None,
+    }
+
+
+def iter_layout_json(layout: dict):
+    """
+    Yields the layout as JSON in chunks of STREAM_CHUNK_SIZE items, so the
+    first nodes go out before the whole document is encoded.
+    """
+    for name, prefix in (("nodes", '{"nodes": ['), ("edges", '], "edges": [')):
+        yield prefix
+        items = layout[name]
+        for start in range(0, len(items), STREAM_CHUNK_SIZE):
+            chunk = ", ".join(
+                json.dumps(item) for item in items[start : start + STREAM_CHUNK_SIZE]
+            )
+            yield chunk if start == 0 else ", " + chunk
+    yield f'], "next": {json.dumps(layout.get("next"))}}}'
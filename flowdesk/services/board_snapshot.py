@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db.models import OuterRef, Q, Subquery
+
+from flowdesk.models import Board, List, Task
+from flowdesk.services.url_templates import reverse_template
+
+CARDS_PER_PAGE = 50
+CARD_FIELDS = ("id", "title", "position", "list_id", "priority", "status", "deadline")
+
+
+@dataclass(slots=True)
+class TaskCard:
+    id: int
+    title: str
+    position: int
+    list_id: int
+    priority: str
+    status: str
+    deadline: datetime | None
+    url: str
+
+    @property
+    def priority_label(self) -> str:
+        return Task.Priority(self.priority).label
+
+    @property
+    def status_label(self) -> str:
+        return Task.Status(self.status).label
+
+
+@dataclass(slots=True)
+class ListColumn:
+    id: int
+    name: str
+    position: int
+    update_url: str
+    delete_url: str
+    create_task_url: str
+    cards_url: str
+    tasks: list[TaskCard] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(card: TaskCard) -> str:
+    return f"{card.position}:{card.id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    position, pk = cursor.split(":")
+    return int(position), int(pk)
+
+
+def _task_url_template(workspace_id: int, board_id: int) -> str:
+    return reverse_template(
+        "flowdesk:task-detail", (workspace_id, board_id, None, None)
+    )
+
+
+def _make_cards(rows, task_detail_url: str) -> list[TaskCard]:
+    cards = []
+    for row in rows:
+        card = TaskCard(*row, url="")
+        card.url = task_detail_url.format(card.list_id, card.id)
+        cards.append(card)
+    return cards
+
+
+def build_board_snapshot(
+    board: Board, per_list: int = CARDS_PER_PAGE
+) -> list[ListColumn]:
+    """
+    Returns the board's lists with up to per_list task cards each, as plain
+    records. Cards carry CARD_FIELDS only, never the task description.
+    Costs two queries whatever the number of tasks; every URL is formatted
+    from a template reversed once per board.
+    """
+    base_args = (board.workspace_id, board.pk)
+    list_update_url = reverse_template("flowdesk:list-update", (*base_args, None))
+    list_delete_url = reverse_template("flowdesk:list-delete", (*base_args, None))
+    task_create_url = reverse_template("flowdesk:task-create", (*base_args, None))
+    task_cards_url = reverse_template("flowdesk:task-cards", (*base_args, None))
+    task_detail_url = _task_url_template(*base_args)
+
+    # the (position, id) of each list's card just past the first page; a
+    # LIMIT/OFFSET on the (list, position, id) index, so it reads at most
+    # per_list + 1 entries per list
+    past_page = Task.objects.filter(list=OuterRef("pk")).order_by("position", "pk")[
+        per_list : per_list + 1
+    ]
+    lists = board.lists.annotate(
+        cut_position=Subquery(past_page.values("position")),
+        cut_pk=Subquery(past_page.values("pk")),
+    ).order_by("position", "pk")
+
+    columns = {}
+    # one row more than needed per list tells whether a next page exists
+    windows = Q()
+    for lst in lists:
+        columns[lst.pk] = ListColumn(
+            id=lst.pk,
+            name=lst.name,
+            position=lst.position,
+            update_url=list_update_url.format(lst.pk),
+            delete_url=list_delete_url.format(lst.pk),
+            create_task_url=task_create_url.format(lst.pk),
+            cards_url=task_cards_url.format(lst.pk),
+        )
+        window = Q(list_id=lst.pk)
+        if lst.cut_pk is not None:
+            window &= Q(position__lt=lst.cut_position) | Q(
+                position=lst.cut_position, pk__lte=lst.cut_pk
+            )
+        windows |= window
+    if not columns:
+        return []
+
+    # each list's window is a range scan of the index, rather than a
+    # numbering of every task on the board
+    rows = (
+        Task.objects.filter(windows)
+        .order_by("list_id", "position", "pk")
+        .values_list(*CARD_FIELDS)
+    )
+    for card in _make_cards(rows, task_detail_url):
+        columns[card.list_id].tasks.append(card)
+
+    for column in columns.values():
+        if len(column.tasks) > per_list:
+            column.tasks.pop()
+            column.next_cursor = encode_cursor(column.tasks[-1])
+    return list(columns.values())
+
+
+def load_list_cards(
+    lst: List, after: tuple[int, int] | None = None, limit: int = CARDS_PER_PAGE
+) -> tuple[list[TaskCard], str | None]:
+    """
+    Returns the next page of a list's cards, keyset-paginated on
+    (position, id), and the cursor of the page after it.
+    """
+    queryset = Task.objects.filter(list=lst).order_by("position", "pk")
+    if after is not None:
+        position, pk = after
+        queryset = queryset.filter(
+            Q(position__gt=position) | Q(position=position, pk__gt=pk)
+        )
+
+    rows = queryset.values_list(*CARD_FIELDS)[: limit + 1]
+    cards = _make_cards(rows, _task_url_template(lst.board.workspace_id, lst.board_id))
+    next_cursor = None
+    if len(cards) > limit:
+        cards.pop()
+        next_cursor = encode_cursor(cards[-1])
+    return cards, next_cursor
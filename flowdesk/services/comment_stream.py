@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+from accounts.services.avatar_service import avatar_urls
+from flowdesk.models import Comment, Task
+
+COMMENTS_PER_PAGE = 20
+
+
+def encode_cursor(comment: Comment) -> str:
+    return f"{comment.created_at.isoformat()}|{comment.pk}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, pk = cursor.split("|")
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def load_comments(
+    task: Task,
+    before: tuple[datetime, int] | None = None,
+    limit: int = COMMENTS_PER_PAGE,
+) -> tuple[list[Comment], str | None]:
+    """
+    Returns a page of the task's comments, newest first, keyset-paginated
+    on (created_at, id), and the cursor of the older page after it. Each
+    comment carries the avatar_url of its author.
+    """
+    queryset = Comment.objects.filter(task=task).select_related("created_by__profile")
+    if before is not None:
+        created_at, pk = before
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    comments = list(queryset.order_by("-created_at", "-pk")[: limit + 1])
+    next_cursor = None
+    if len(comments) > limit:
+        comments.pop()
+        next_cursor = encode_cursor(comments[-1])
+
+    avatars = avatar_urls({comment.created_by for comment in comments})
+    for comment in comments:
+        comment.avatar_url = avatars.get(comment.created_by_id)
+    return comments, next_cursor
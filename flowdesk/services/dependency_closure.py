@@ -0,0 +1,140 @@
+from django.db import connection
+from django.db.models import QuerySet
+
+from flowdesk.models import Board, List, Task, TaskDependencyClosure, Workspace
+
+Dependency = Task.blocking_tasks.through
+CLOSURE_TABLE = TaskDependencyClosure._meta.db_table
+DEPENDENCY_TABLE = Dependency._meta.db_table
+BLOCKED_COLUMN = Dependency._meta.get_field("from_task").column
+BLOCKER_COLUMN = Dependency._meta.get_field("to_task").column
+
+# walks every edge upwards from the selected blocked tasks; UNION keeps a
+# cycle from looping and leaves (task, task) rows for the tasks on it
+REFRESH_SQL = f"""
+INSERT INTO {CLOSURE_TABLE} (ancestor_id, descendant_id)
+WITH RECURSIVE up(descendant, ancestor) AS (
+    SELECT {BLOCKED_COLUMN}, {BLOCKER_COLUMN} FROM {DEPENDENCY_TABLE}
+    {{where}}
+    UNION
+    SELECT up.descendant, dep.{BLOCKER_COLUMN}
+    FROM up JOIN {DEPENDENCY_TABLE} dep ON dep.{BLOCKED_COLUMN} = up.ancestor
+)
+SELECT ancestor, descendant FROM up
+"""
+
+# how a delete that starts at each model reaches the tasks it removes
+DELETED_TASKS = {
+    Task: "pk",
+    List: "list",
+    Board: "list__board",
+    Workspace: "list__board__workspace",
+}
+
+
+def blockers_of(task_id: int) -> QuerySet:
+    """
+    Every task that task_id waits on, directly or transitively.
+    """
+    return Task.objects.filter(descendant_links__descendant_id=task_id)
+
+
+def blocked_by(task_id: int) -> QuerySet:
+    """
+    Every task that waits on task_id, directly or transitively.
+    """
+    return Task.objects.filter(ancestor_links__ancestor_id=task_id)
+
+
+def cycle_forming_ids(task_id: int, blocker_ids) -> set[int]:
+    """
+    Returns the ids among blocker_ids that task_id already blocks, directly
+    or transitively, so making them its blockers would close a cycle.
+    """
+    return set(
+        TaskDependencyClosure.objects.filter(
+            ancestor_id=task_id, descendant_id__in=blocker_ids
+        ).values_list("descendant_id", flat=True)
+    )
+
+
+def descendant_ids(task_ids) -> set[int]:
+    return set(
+        TaskDependencyClosure.objects.filter(ancestor_id__in=task_ids).values_list(
+            "descendant_id", flat=True
+        )
+    )
+
+
+def deleted_with(origin) -> QuerySet | None:
+    """
+    The tasks a delete starting at origin, an instance or a queryset,
+    removes; None when the delete starts somewhere else.
+    """
+    if isinstance(origin, QuerySet):
+        model, lookup, value = origin.model, "__in", origin.values("pk")
+    else:
+        model, lookup, value = type(origin), "", getattr(origin, "pk", None)
+    path = DELETED_TASKS.get(model)
+    if path is None:
+        return None
+    return Task.objects.filter(**{path + lookup: value})
+
+
+def surviving_descendant_ids(tasks: QuerySet) -> set[int]:
+    """
+    The tasks outside tasks that they block; their closure rows go stale
+    when tasks are deleted.
+    """
+    return set(
+        TaskDependencyClosure.objects.filter(ancestor__in=tasks)
+        .exclude(descendant__in=tasks)
+        .values_list("descendant_id", flat=True)
+    )
+
+
+def add_edges(edges) -> None:
+    """
+    Records new (blocker, blocked) edges: every ancestor of the blocker now
+    also blocks every descendant of the blocked task.
+    """
+    for blocker_id, blocked_id in edges:
+        ancestors = {blocker_id} | set(
+            TaskDependencyClosure.objects.filter(descendant_id=blocker_id).values_list(
+                "ancestor_id", flat=True
+            )
+        )
+        descendants = {blocked_id} | descendant_ids([blocked_id])
+        TaskDependencyClosure.objects.bulk_create(
+            (
+                TaskDependencyClosure(ancestor_id=ancestor, descendant_id=descendant)
+                for ancestor in ancestors
+                for descendant in descendants
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+def refresh(task_ids=None) -> int:
+    """
+    Recomputes the closure rows of the given blocked tasks and everything
+    they block, or of every task when task_ids is None. Returns the number
+    of rows written.
+    """
+    rows = TaskDependencyClosure.objects.all()
+    params = []
+    where = ""
+    if task_ids is not None:
+        task_ids = set(task_ids) | descendant_ids(task_ids)
+        if not task_ids:
+            return 0
+        rows = rows.filter(descendant_id__in=task_ids)
+        params = list(task_ids)
+        placeholders = ", ".join(["%s"] * len(params))
+        where = f"WHERE {BLOCKED_COLUMN} IN ({placeholders})"
+
+    rows.delete()
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL.format(where=where), params)
+        return cursor.rowcount
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.http import Http404
+
+from flowdesk.models import Board, Task
+from flowdesk.services.task_graph import GraphQuery, build_task_graph
+
+GRAPH_CACHE_TTL = 60 * 60 * 24
+
+
+def bump_graph_version(**filters) -> None:
+    """
+    Marks the cached graphs of the matching boards as stale, e.g.
+    bump_graph_version(lists__tasks__in=[task.pk]).
+    """
+    Board.objects.filter(**filters).update(graph_version=F("graph_version") + 1)
+
+
+def graph_etag(board: Board, task_pk: int, query: GraphQuery = GraphQuery()) -> str:
+    return f'"graph-{board.pk}-{task_pk}-{board.graph_version}-{query.cache_key}"'
+
+
+def _get_cache_key(board: Board, task_pk: int, query: GraphQuery) -> str:
+    return (
+        f"flowdesk:graph:{board.pk}:{task_pk}:{board.graph_version}:{query.cache_key}"
+    )
+
+
+def get_task_graph(
+    board: Board, task_pk: int, query: GraphQuery = GraphQuery()
+) -> dict:
+    """
+    Returns the dependency graph around task_pk, built at most once per
+    graph version of the board and query.
+    """
+    key = _get_cache_key(board, task_pk, query)
+    graph = cache.get(key)
+    if graph is None:
+        queryset = Task.objects.filter(list__board=board)
+        task = queryset.filter(pk=task_pk).only("id").first()
+        if task is None:
+            raise Http404("No task found matching the query")
+        graph = build_task_graph(task, queryset, board.workspace_id, board.pk, query)
+        cache.set(key, graph, GRAPH_CACHE_TTL)
+    return graph
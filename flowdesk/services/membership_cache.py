@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from base.cache import is_shared
+from flowdesk.models import WorkspaceMember
+
+NOT_A_MEMBER = ""
+
+
+class MembershipCache:
+    """
+    Caches a user's role in a workspace under (user_id, workspace_id).
+
+    A small per-process LRU sits in front of Django's cache. Local entries
+    live for LOCAL_TTL seconds only, which bounds how long another process
+    can serve a role that was invalidated elsewhere.
+
+    Invalidation only reaches other processes through a shared cache (see
+    REDIS_URL in settings). With a process-local cache nothing is cached
+    and every role is read from the database.
+    """
+
+    CACHE_TTL = 60 * 5
+    LOCAL_TTL = 5
+    LOCAL_MAX_SIZE = 2048
+
+    def __init__(self):
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return is_shared()
+
+    @staticmethod
+    def _get_cache_key(user_id: int, workspace_id: int) -> str:
+        return f"flowdesk:membership:{user_id}:{workspace_id}"
+
+    def _get_local(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            role, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            self.local_hits += 1
+            return role
+
+    def _set_local(self, key: str, role: str) -> None:
+        with self._lock:
+            self._local[key] = (role, time.monotonic() + self.LOCAL_TTL)
+            self._local.move_to_end(key)
+            while len(self._local) > self.LOCAL_MAX_SIZE:
+                self._local.popitem(last=False)
+
+    def get(self, user_id: int, workspace_id: int) -> str | None:
+        """
+        Returns the cached role, NOT_A_MEMBER for a cached negative lookup
+        or None when nothing is cached.
+        """
+        if not self.enabled:
+            with self._lock:
+                self.misses += 1
+            return None
+        key = self._get_cache_key(user_id, workspace_id)
+        role = self._get_local(key)
+        if role is not None:
+            return role
+
+        role = cache.get(key)
+        with self._lock:
+            if role is None:
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+        if role is not None:
+            self._set_local(key, role)
+        return role
+
+    def set(self, user_id: int, workspace_id: int, role: str | None) -> None:
+        if not self.enabled:
+            return
+        key = self._get_cache_key(user_id, workspace_id)
+        role = role or NOT_A_MEMBER
+        cache.set(key, role, self.CACHE_TTL)
+        self._set_local(key, role)
+
+    def get_role(self, user_id: int, workspace_id: int) -> str | None:
+        role = self.get(user_id, workspace_id)
+        if role is None:
+            role = (
+                WorkspaceMember.objects.filter(
+                    user_id=user_id, workspace_id=workspace_id
+                )
+                .values_list("role", flat=True)
+                .first()
+            )
+            self.set(user_id, workspace_id, role)
+        return role or None
+
+    def invalidate(self, user_id: int, workspace_id: int) -> None:
+        self.invalidate_many([(user_id, workspace_id)])
+
+    def invalidate_many(self, pairs) -> None:
+        keys = [self._get_cache_key(*pair) for pair in pairs]
+        cache.delete_many(keys)
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "hits": self.local_hits + self.shared_hits,
+                "misses": self.misses,
+                "local_size": len(self._local),
+            }
+
+
+membership_cache = MembershipCache()
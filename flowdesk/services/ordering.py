@@ -0,0 +1,199 @@
+from django.db import transaction
+from django.db.models import F, Model, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from flowdesk.models import Board, List, Task
+from flowdesk.services.graph_cache import bump_graph_version
+
+# lists and tasks are ordered by gap-spaced integer positions, so a card can
+# be dropped between two others by writing that card alone
+POSITION_GAP = 1 << 16
+
+
+def position_between(lower: int | None, upper: int | None) -> int | None:
+    """
+    Returns a position strictly between lower and upper (either may be None
+    for an open end), or None when the gap between them is exhausted.
+    """
+    if lower is None and upper is None:
+        return POSITION_GAP
+    if lower is None:
+        return upper - POSITION_GAP
+    if upper is None:
+        return lower + POSITION_GAP
+    if upper - lower > 1:
+        return (lower + upper) // 2
+    return None
+
+
+def _allocate(parent: QuerySet, counter: str) -> int:
+    # the UPDATE locks the parent row, so concurrent creates queue up on it
+    # and each one reads back its own increment
+    with transaction.atomic():
+        parent.update(**{counter: F(counter) + POSITION_GAP})
+        return parent.values_list(counter, flat=True).get()
+
+
+def next_list_position(board_id: int) -> int:
+    """
+    Allocates the position after the last list of the board.
+    """
+    return _allocate(Board.objects.filter(pk=board_id), "last_list_position")
+
+
+def next_task_position(list_id: int) -> int:
+    """
+    Allocates the position after the last task of the list.
+    """
+    return _allocate(List.objects.filter(pk=list_id), "last_task_position")
+
+
+def sync_counters(boards: QuerySet) -> None:
+    """
+    Resets the position counters of boards and their lists to the last
+    position actually in use.
+    """
+    for parent, children, link, counter in (
+        (boards, List.objects.all(), "board", "last_list_position"),
+        (
+            List.objects.filter(board__in=boards),
+            Task.objects.all(),
+            "list",
+            "last_task_position",
+        ),
+    ):
+        last = (
+            children.filter(**{link: OuterRef("pk")})
+            .order_by("-position")
+            .values("position")[:1]
+        )
+        parent.update(**{counter: Coalesce(Subquery(last), Value(0))})
+
+
+def rebalance(siblings: QuerySet) -> int:
+    """
+    Spreads siblings POSITION_GAP apart again, keeping their (position, id)
+    order. Returns the number of rows written.
+    """
+    objs = list(siblings.order_by("position", "pk").only("id", "position"))
+    changed = []
+    for index, obj in enumerate(objs, start=1):
+        if obj.position != index * POSITION_GAP:
+            obj.position = index * POSITION_GAP
+            changed.append(obj)
+    siblings.model.objects.bulk_update(changed, ["position"], batch_size=500)
+    return len(changed)
+
+
+def _place(
+    obj: Model,
+    siblings: QuerySet,
+    parent: QuerySet,
+    counter: str,
+    before,
+    after,
+    **fields
+) -> None:
+    with transaction.atomic():
+        position = position_between(
+            before.position if before else None, after.position if after else None
+        )
+        last = position if after is None else None
+        if position is None:
+            others = siblings.exclude(pk=obj.pk)
+            rebalance(others)
+            last = others.count() * POSITION_GAP
+            fresh = siblings.in_bulk([before.pk, after.pk])
+            before.position = fresh[before.pk].position
+            after.position = fresh[after.pk].position
+            position = position_between(before.position, after.position)
+            if position is None:
+                # neighbours sent in the wrong order still get a valid slot
+                position = before.position + 1
+
+        siblings.model.objects.filter(pk=obj.pk).update(position=position, **fields)
+        if last is not None:
+            # keep the counter past anything moved to (or spread towards) the end
+            parent.update(**{counter: Greatest(F(counter), Value(last))})
+    obj.position = position
+    for name, value in fields.items():
+        setattr(obj, name, value)
+
+
+def move_task(task: Task, list_id: int, before: Task | None, after: Task | None):
+    """
+    Moves task into list_id between its new neighbours. Only the moved task
+    is written unless its neighbours have no free position left between
+    them, in which case the target list is rebalanced first.
+    """
+    if task.list_id != list_id:
+        # graphs label each task with its list
+        bump_graph_version(lists=list_id)
+    _place(
+        task,
+        Task.objects.filter(list_id=list_id),
+        List.objects.filter(pk=list_id),
+        "last_task_position",
+        before,
+        after,
+        list_id=list_id,
+    )
+
+
+def move_list(lst: List, before: List | None, after: List | None):
+    _place(
+        lst,
+        List.objects.filter(board_id=lst.board_id),
+        Board.objects.filter(pk=lst.board_id),
+        "last_list_position",
+        before,
+        after,
+    )
+
+
+def claim_board_version(board_id: int, version: int, list_ids=()) -> bool:
+    """
+    Bumps the board version if it still equals version and stamps list_ids,
+    the lists whose task order the reorder changes, with the new version.
+    Call it inside the transaction that applies the reorder; False means
+    the client is stale.
+    """
+    if not Board.objects.filter(pk=board_id, version=version).update(
+        version=F("version") + 1
+    ):
+        return False
+    if list_ids:
+        List.objects.filter(pk__in=list_ids).update(order_version=version + 1)
+    return True
+
+
+def board_order(board_id: int, since: int, list_ids=()) -> dict:
+    """
+    Returns what a client at version since needs to resync: the current
+    version, the list order of the board and the task order of every list
+    reordered after since, plus list_ids, the lists the rejected move
+    touched on the client.
+    """
+    version = Board.objects.filter(pk=board_id).values_list("version", flat=True)
+    task_order = {
+        list_id: []
+        for list_id in List.objects.filter(
+            Q(order_version__gt=since) | Q(pk__in=list_ids), board_id=board_id
+        ).values_list("pk", flat=True)
+    }
+    tasks = (
+        Task.objects.filter(list_id__in=task_order)
+        .order_by("position", "pk")
+        .values_list("list_id", "pk")
+    )
+    for list_id, task_id in tasks:
+        task_order[list_id].append(task_id)
+    return {
+        "version": version.get(),
+        "lists": list(
+            List.objects.filter(board_id=board_id)
+            .order_by("position", "pk")
+            .values_list("pk", flat=True)
+        ),
+        "tasks": {str(list_id): ids for list_id, ids in task_order.items()},
+    }
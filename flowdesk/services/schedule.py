@@ -0,0 +1,198 @@
+import heapq
+import math
+from array import array
+from itertools import accumulate
+from dataclasses import dataclass
+
+from flowdesk.models import Board, Task
+
+PRIORITY_WEIGHTS = {
+    Task.Priority.LOW: 1,
+    Task.Priority.MEDIUM: 2,
+    Task.Priority.HIGH: 3,
+    Task.Priority.URGENT: 4,
+    Task.Priority.CRITICAL: 5,
+}
+FINISHED_STATUSES = {Task.Status.DONE, Task.Status.ARCHIVED}
+WEIGHTS = ("priority", "deadline")
+
+
+@dataclass(slots=True)
+class DependencyGraph:
+    """
+    A board's dependency DAG with tasks numbered 0..n-1. Successors of node
+    i (the tasks it blocks) are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    ids: list[int]
+    priorities: array
+    deadlines: array
+    finished: bytearray
+    offsets: array
+    targets: array
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass(slots=True)
+class Schedule:
+    order: list[int]
+    cyclic: list[int]
+    critical_path: list[int]
+    critical_weight: int
+    ready: list[int]
+
+    def as_dict(self) -> dict:
+        return {
+            "order": self.order,
+            "cyclic": self.cyclic,
+            "critical_path": {
+                "tasks": self.critical_path,
+                "weight": self.critical_weight,
+            },
+            "ready": self.ready,
+        }
+
+
+def build_graph(tasks, edges) -> DependencyGraph:
+    """
+    tasks are (id, priority, status, deadline) rows and edges are
+    (blocker_id, blocked_id) rows; edges to unknown tasks are dropped.
+    """
+    ids = []
+    priorities = array("b")
+    deadlines = array("d")
+    finished = bytearray()
+    for task_id, priority, status, deadline in tasks:
+        ids.append(task_id)
+        priorities.append(PRIORITY_WEIGHTS.get(priority, 1))
+        deadlines.append(deadline.timestamp() if deadline else math.inf)
+        finished.append(status in FINISHED_STATUSES)
+
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    successors = [[] for _ in ids]
+    for blocker, blocked in edges:
+        source = index.get(blocker)
+        target = index.get(blocked)
+        if source is not None and target is not None:
+            successors[source].append(target)
+    offsets = array("l", accumulate(map(len, successors), initial=0))
+    targets = array("l")
+    for block in successors:
+        targets.extend(block)
+    return DependencyGraph(ids, priorities, deadlines, finished, offsets, targets)
+
+
+def load_board_graph(board: Board) -> DependencyGraph:
+    tasks = (
+        Task.objects.filter(list__board=board)
+        .order_by()
+        .values_list("id", "priority", "status", "deadline")
+    )
+    edges = Task.blocking_tasks.through.objects.filter(
+        from_task__list__board=board
+    ).values_list("to_task_id", "from_task_id")
+    return build_graph(tasks, edges)
+
+
+def topological_order(graph: DependencyGraph) -> tuple[list[int], list[int]]:
+    """
+    Kahn's algorithm; among tasks that are free at the same time the
+    earliest deadline, then the highest priority goes first. Returns node
+    indices in order and the indices left over on cycles.
+    """
+    offsets, targets = graph.offsets.tolist(), graph.targets.tolist()
+    indegree = [0] * len(graph)
+    for target in targets:
+        indegree[target] += 1
+
+    # sort once by urgency so the heap compares ints rather than tuples
+    keys = list(zip(graph.deadlines, [-p for p in graph.priorities], graph.ids))
+    by_urgency = sorted(range(len(graph)), key=keys.__getitem__)
+    rank = [0] * len(graph)
+    for position, node in enumerate(by_urgency):
+        rank[node] = position
+
+    heap = [rank[i] for i in range(len(graph)) if not indegree[i]]
+    heapq.heapify(heap)
+    pop, push = heapq.heappop, heapq.heappush
+    order = []
+    while heap:
+        node = by_urgency[pop(heap)]
+        order.append(node)
+        for target in targets[offsets[node] : offsets[node + 1]]:
+            indegree[target] -= 1
+            if not indegree[target]:
+                push(heap, rank[target])
+
+    cyclic = [i for i in range(len(graph)) if indegree[i]]
+    return order, cyclic
+
+
+def critical_path(
+    graph: DependencyGraph, order: list[int], weight: str = "priority"
+) -> tuple[list[int], int]:
+    """
+    With weight="priority" this is the chain of unfinished tasks with the
+    highest total priority. With weight="deadline" it is the longest chain
+    leading to the unfinished task that is due first.
+    """
+    offsets, targets = graph.offsets.tolist(), graph.targets.tolist()
+    weights = [
+        0 if done else (priority if weight == "priority" else 1)
+        for done, priority in zip(graph.finished, graph.priorities)
+    ]
+    best = weights[:]
+    previous = [-1] * len(graph)
+    for node in order:
+        reached = best[node]
+        for target in targets[offsets[node] : offsets[node + 1]]:
+            if reached + weights[target] > best[target]:
+                best[target] = reached + weights[target]
+                previous[target] = node
+
+    if not order:
+        return [], 0
+    node = max(order, key=best.__getitem__)
+    if weight == "deadline":
+        due = [i for i in order if weights[i] and graph.deadlines[i] < math.inf]
+        if due:
+            node = min(due, key=lambda i: (graph.deadlines[i], -best[i]))
+    total = best[node]
+    path = []
+    while node != -1:
+        if weights[node]:
+            path.append(node)
+        node = previous[node]
+    path.reverse()
+    return path, total
+
+
+def ready_frontier(graph: DependencyGraph) -> list[int]:
+    """
+    Unfinished tasks whose blockers are all finished, most urgent first.
+    """
+    offsets, targets = graph.offsets.tolist(), graph.targets.tolist()
+    finished = graph.finished
+    waiting = bytearray(len(graph))
+    for node in range(len(graph)):
+        if not finished[node]:
+            for target in targets[offsets[node] : offsets[node + 1]]:
+                waiting[target] = 1
+    ready = [i for i in range(len(graph)) if not finished[i] and not waiting[i]]
+    ready.sort(key=lambda i: (graph.deadlines[i], -graph.priorities[i], graph.ids[i]))
+    return ready
+
+
+def build_schedule(graph: DependencyGraph, weight: str = "priority") -> Schedule:
+    order, cyclic = topological_order(graph)
+    path, total = critical_path(graph, order, weight)
+    ids = graph.ids
+    return Schedule(
+        order=[ids[i] for i in order],
+        cyclic=[ids[i] for i in cyclic],
+        critical_path=[ids[i] for i in path],
+        critical_weight=total,
+        ready=[ids[i] for i in ready_frontier(graph)],
+    )
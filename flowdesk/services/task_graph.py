@@ -1,45 +1,208 @@
-from collections import deque
+from dataclasses import dataclass
 
-from django.db.models import QuerySet
-from django.urls import reverse
+from django.db import connection
+from django.db.models import Q, QuerySet
 
 from flowdesk.models import Task
+from flowdesk.services.url_templates import reverse_template
 
+Dependency = Task.blocking_tasks.through
+# a row (blocked, blocker) means the blocker has to be done first
+BLOCKED_COLUMN = Dependency._meta.get_field("from_task").column
+BLOCKER_COLUMN = Dependency._meta.get_field("to_task").column
 
-def build_task_graph(
-    task: Task, queryset: QuerySet, workspace_pk: int, board_pk: int
-) -> dict:
-    visited = set()
-    queue = deque([task])
-    related_ids = set([task.pk])
+BOTH, BLOCKERS, BLOCKED = "both", "blockers", "blocked"
+DIRECTIONS = (BOTH, BLOCKERS, BLOCKED)
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 10
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+# rows of the walk read at most, so a huge component costs no more than a
+# few pages of it; whatever is cut off shows up behind frontier nodes
+MAX_REACH = 10 * MAX_LIMIT
 
-    while queue:
-        current = queue.popleft()
-        if current.pk in visited:
-            continue
-        visited.add(current.pk)
+# link(a, b) means the walk may step from a to b
+_TABLE = Dependency._meta.db_table
+_LINKS = {
+    BLOCKERS: f"SELECT {BLOCKED_COLUMN}, {BLOCKER_COLUMN} FROM {_TABLE}",
+    BLOCKED: f"SELECT {BLOCKER_COLUMN}, {BLOCKED_COLUMN} FROM {_TABLE}",
+}
+_LINKS[BOTH] = f"{_LINKS[BLOCKERS]} UNION ALL {_LINKS[BLOCKED]}"
 
-        for blocker in current.blocking_tasks.all():
-            if blocker.pk not in related_ids:
-                related_ids.add(blocker.pk)
-                queue.append(blocker)
+# UNION (rather than UNION ALL) drops revisited (id, depth) pairs and the
+# depth bound stops the walk, so cycles and dense webs both terminate. The
+# walk runs breadth first and the outer LIMIT ends it at the level that
+# fills MAX_REACH rows, not at the end of the component. The root is cast
+# to bigint like the id columns: Postgres rejects a recursive CTE whose
+# terms disagree on a column type.
+REACH_SQL = """
+WITH RECURSIVE
+    link(a, b) AS ({links}),
+    reach(id, depth) AS (
+        SELECT CAST(%s AS bigint), 0
+        UNION
+        SELECT link.b, reach.depth + 1 FROM link JOIN reach ON link.a = reach.id
+        WHERE reach.depth < %s
+    )
+SELECT id, depth FROM reach LIMIT %s
+"""
 
-        for blocked in current.tasks.all():
-            if blocked.pk not in related_ids:
-                related_ids.add(blocked.pk)
-                queue.append(blocked)
+RECURSIVE_CTE_VENDORS = ("postgresql", "sqlite")
 
-    tasks = queryset.filter(pk__in=related_ids)
 
-    nodes = []
+@dataclass(frozen=True)
+class GraphQuery:
+    depth: int = DEFAULT_DEPTH
+    limit: int = DEFAULT_LIMIT
+    direction: str = BOTH
+    after: tuple[int, int] | None = None
+
+    @classmethod
+    def from_params(cls, params) -> "GraphQuery":
+        """
+        Reads depth, limit, direction and the "after" cursor from a QueryDict,
+        clamping depth and limit. Raises ValueError on malformed input.
+        """
+        direction = params.get("direction", BOTH)
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        after = params.get("after")
+        if after:
+            depth, task_id = after.split(":")
+            after = (int(depth), int(task_id))
+        return cls(
+            depth=min(max(int(params.get("depth", DEFAULT_DEPTH)), 1), MAX_DEPTH),
+            limit=min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT),
+            direction=direction,
+            after=after or None,
+        )
+
+    @property
+    def cache_key(self) -> str:
+        after = "{}:{}".format(*self.after) if self.after else ""
+        return f"{self.depth}:{self.limit}:{self.direction}:{after}"
+
+
+def _links_from(task_ids, direction: str) -> Q:
+    if direction == BLOCKERS:
+        return Q(from_task_id__in=task_ids)
+    if direction == BLOCKED:
+        return Q(to_task_id__in=task_ids)
+    return Q(from_task_id__in=task_ids) | Q(to_task_id__in=task_ids)
+
+
+def _reach_by_level(
+    task_id: int, depth: int, direction: str, max_rows: int
+) -> dict[int, int]:
+    # one query per step away from the root instead of one per task
+    distances = {task_id: 0}
+    frontier = {task_id}
+    for level in range(1, depth + 1):
+        if not frontier:
+            break
+        rows = Dependency.objects.filter(_links_from(frontier, direction))
+        found = set()
+        for blocked, blocker in rows.values_list("from_task_id", "to_task_id"):
+            if direction != BLOCKED and blocked in frontier:
+                found.add(blocker)
+            if direction != BLOCKERS and blocker in frontier:
+                found.add(blocked)
+        room = max_rows - len(distances)
+        frontier = set(sorted(found - distances.keys())[:room])
+        distances.update(dict.fromkeys(frontier, level))
+    return distances
+
+
+def reach(
+    task_id: int, depth: int, direction: str = BOTH, max_rows: int = MAX_REACH
+) -> dict[int, int]:
+    """
+    Maps the tasks within depth steps of task_id to their distance, reading
+    at most max_rows rows of the walk, nearest first. Runs a single query on
+    backends with recursive CTEs.
+    """
+    if connection.vendor not in RECURSIVE_CTE_VENDORS:
+        return _reach_by_level(task_id, depth, direction, max_rows)
+    distances = {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            REACH_SQL.format(links=_LINKS[direction]), [task_id, depth, max_rows]
+        )
+        for found, distance in cursor.fetchall():
+            distances[found] = min(distance, distances.get(found, distance))
+    return distances
+
+
+def build_task_graph(
+    task: Task,
+    queryset: QuerySet,
+    workspace_pk: int,
+    board_pk: int,
+    query: GraphQuery = GraphQuery(),
+    max_reach: int = MAX_REACH,
+) -> dict:
+    """
+    Returns one page of the graph around task: at most query.limit nodes
+    within query.depth steps, in (distance, id) order. "next" is the cursor
+    of the following page and "frontier" lists the returned nodes that have
+    neighbours beyond the depth bound, or cut off by max_reach, to be
+    expanded as roots of their own.
+    """
+    distances = reach(task.pk, query.depth, query.direction, max_reach)
+    ranked = sorted((depth, task_id) for task_id, depth in distances.items())
+    if query.after:
+        ranked = [key for key in ranked if key > query.after]
+    page = ranked[: query.limit]
+    next_cursor = "{}:{}".format(*page[-1]) if len(ranked) > query.limit else None
+    page_ids = {task_id for _, task_id in page}
+    # edges to nodes of later pages are sent along with those pages
+    sent = {
+        task_id
+        for task_id, depth in distances.items()
+        if page and (depth, task_id) <= page[-1]
+    }
+
     edges = []
+    frontier = set()
+    rows = Dependency.objects.filter(
+        Q(from_task_id__in=page_ids) | Q(to_task_id__in=page_ids)
+    ).values_list("to_task_id", "from_task_id")
+    for blocker_id, blocked_id in rows:
+        if blocker_id in sent and blocked_id in sent:
+            edges.append((blocker_id, blocked_id))
+        elif blocker_id not in distances and query.direction != BLOCKED:
+            frontier.add(blocked_id)
+        elif blocked_id not in distances and query.direction != BLOCKERS:
+            frontier.add(blocker_id)
 
-    for t in tasks:
+    tasks = {
+        t.pk: t
+        for t in queryset.filter(pk__in=page_ids)
+        .select_related("list")
+        .only("id", "title", "list__name")
+    }
+    titles = {pk: t.title for pk, t in tasks.items()}
+    earlier_ids = {pk for edge in edges for pk in edge} - page_ids
+    if earlier_ids:
+        titles.update(
+            queryset.filter(pk__in=earlier_ids).order_by().values_list("id", "title")
+        )
+    blocker_ids = {blocker for blocker, blocked in edges if blocked == task.pk}
+    blocked_ids = {blocked for blocker, blocked in edges if blocker == task.pk}
+    task_url = reverse_template(
+        "flowdesk:task-detail", (workspace_pk, board_pk, None, None)
+    )
+
+    nodes = []
+    for depth, task_id in page:
+        t = tasks.get(task_id)
+        if t is None:
+            continue
         if t.pk == task.pk:
             group = "current"
-        elif t in task.blocking_tasks.all():
+        elif t.pk in blocker_ids:
             group = "blockers"
-        elif t in task.tasks.all():
+        elif t.pk in blocked_ids:
             group = "blocked"
         else:
             group = "related"
@@ -50,26 +213,22 @@ def build_task_graph(
                 "label": t.title,
                 "title": f"from list: {t.list.name}",
                 "group": group,
-                "url": reverse(
-                    "flowdesk:task-detail",
-                    args=(
-                        workspace_pk,
-                        board_pk,
-                        t.list.pk,
-                        t.pk,
-                    ),
-                ),
+                "depth": depth,
+                "url": task_url.format(t.list_id, t.pk),
             }
         )
 
-        for blocker in t.blocking_tasks.all():
-            if blocker.pk in related_ids:
-                edges.append(
-                    {
-                        "from": blocker.pk,
-                        "to": t.pk,
-                        "title": f"{blocker.title} → {t.title}",
-                    }
-                )
-
-    return {"nodes": nodes, "edges": edges}
+    return {
+        "nodes": nodes,
+        "edges": [
+            {
+                "from": blocker_id,
+                "to": blocked_id,
+                "title": f"{titles[blocker_id]} → {titles[blocked_id]}",
+            }
+            for blocker_id, blocked_id in edges
+            if blocker_id in titles and blocked_id in titles
+        ],
+        "frontier": sorted(frontier & tasks.keys()),
+        "next": next_cursor,
+    }
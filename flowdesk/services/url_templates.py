@@ -0,0 +1,25 @@
+from django.urls import reverse
+
+_SENTINEL = 918273645000
+
+
+def reverse_template(viewname: str, args: tuple) -> str:
+    """
+    Reverses viewname once and returns a str.format() template where every
+    None in args became a positional slot, e.g.
+    reverse_template("flowdesk:task-detail", (1, 2, None, None)).format(3, 4).
+    """
+    sentinels = {}
+    reverse_args = []
+    for arg in args:
+        if arg is None:
+            sentinel = _SENTINEL + len(sentinels)
+            sentinels[str(sentinel)] = "{%d}" % len(sentinels)
+            arg = sentinel
+        reverse_args.append(arg)
+
+    template = reverse(viewname, args=reverse_args)
+    template = template.replace("{", "{{").replace("}", "}}")
+    for sentinel, slot in sentinels.items():
+        template = template.replace(sentinel, slot)
+    return template
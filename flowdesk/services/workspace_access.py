@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import PermissionDenied
+from django.db.models import Model, OuterRef, Subquery
+from django.http import HttpRequest
+from django.shortcuts import get_object_or_404
+
+from flowdesk.models import Workspace, WorkspaceMember, Board, List, Task, Tag
+from flowdesk.services.membership_cache import membership_cache
+
+
+@dataclass
+class WorkspaceAccess:
+    workspace: Workspace
+    role: str
+    board: Board | None = None
+    list: List | None = None
+    task: Task | None = None
+    tag: Tag | None = None
+
+    def has_role(self, *roles: str) -> bool:
+        return self.role in roles
+
+    def has_role_at_least(self, role: str) -> bool:
+        ranks = WorkspaceMember.ROLE_RANKS
+        return ranks[self.role] >= ranks[role]
+
+
+def _member_roles(request: HttpRequest) -> dict:
+    if not hasattr(request, "_member_roles"):
+        request._member_roles = {}
+    return request._member_roles
+
+
+def _access_query(
+    user, workspace_pk, board_pk, list_pk, task_pk, tag_pk, with_role=True
+):
+    """
+    Picks the deepest requested object as the root of the query so the
+    whole chain up to the workspace comes back through select_related.
+    """
+    filters = {}
+    if task_pk is not None:
+        model, workspace_path = Task, "list__board__workspace"
+        filters["pk"] = task_pk
+        if list_pk is not None:
+            filters["list_id"] = list_pk
+        if board_pk is not None:
+            filters["list__board_id"] = board_pk
+    elif list_pk is not None:
+        model, workspace_path = List, "board__workspace"
+        filters["pk"] = list_pk
+        if board_pk is not None:
+            filters["board_id"] = board_pk
+    elif board_pk is not None:
+        model, workspace_path = Board, "workspace"
+        filters["pk"] = board_pk
+    elif tag_pk is not None:
+        model, workspace_path = Tag, "workspace"
+        filters["pk"] = tag_pk
+    else:
+        model, workspace_path = Workspace, None
+
+    if workspace_path:
+        filters[f"{workspace_path}_id"] = workspace_pk
+        queryset = model.objects.select_related(workspace_path)
+        workspace_ref = OuterRef(f"{workspace_path}_id")
+    else:
+        filters["pk"] = workspace_pk
+        queryset = model.objects.all()
+        workspace_ref = OuterRef("pk")
+
+    if model is Task:
+        # views that need the full task (detail, update) fetch it themselves
+        queryset = queryset.defer("description")
+
+    if with_role:
+        role = WorkspaceMember.objects.filter(
+            user_id=user.pk, workspace_id=workspace_ref
+        ).values("role")[:1]
+        queryset = queryset.annotate(member_role=Subquery(role))
+    return queryset.filter(**filters)
+
+
+def _raise_access_error(user, workspace_pk, board_pk, list_pk, task_pk, tag_pk):
+    workspace = get_object_or_404(Workspace, pk=workspace_pk)
+    if not workspace.memberships.filter(user_id=user.pk).exists():
+        raise PermissionDenied("You do not have access to this workspace")
+
+    for model, pk in (
+        (Board, board_pk),
+        (List, list_pk),
+        (Task, task_pk),
+        (Tag, tag_pk),
+    ):
+        if pk is not None:
+            get_object_or_404(model, pk=pk)
+    raise PermissionDenied("This object does not belong to the workspace")
+
+
+def _build_access(obj: Model, role: str) -> WorkspaceAccess:
+    kwargs = {}
+    if isinstance(obj, Task):
+        kwargs["task"] = obj
+        obj = obj.list
+    if isinstance(obj, List):
+        kwargs["list"] = obj
+        obj = obj.board
+    if isinstance(obj, Board):
+        kwargs["board"] = obj
+        obj = obj.workspace
+    if isinstance(obj, Tag):
+        kwargs["tag"] = obj
+        obj = obj.workspace
+    return WorkspaceAccess(workspace=obj, role=role, **kwargs)
+
+
+def resolve_workspace_access(
+    request: HttpRequest,
+    workspace_pk: int,
+    board_pk: int | None = None,
+    list_pk: int | None = None,
+    task_pk: int | None = None,
+    tag_pk: int | None = None,
+) -> WorkspaceAccess:
+    """
+    Loads the workspace -> board -> list -> task chain together with the
+    caller's role in a single query and memoizes it on the request.
+    """
+    lookup = (workspace_pk, board_pk, list_pk, task_pk, tag_pk)
+    if not hasattr(request, "_workspace_access"):
+        request._workspace_access = {}
+
+    access = request._workspace_access.get(lookup)
+    if access is None:
+        user_id = request.user.pk
+        role = membership_cache.get(user_id, workspace_pk)
+        if role is None:
+            obj = _access_query(request.user, *lookup).first()
+            if obj is not None:
+                role = obj.member_role
+                membership_cache.set(user_id, workspace_pk, role)
+        elif role:
+            obj = _access_query(request.user, *lookup, with_role=False).first()
+        else:
+            obj = None
+
+        if obj is None or not role:
+            _raise_access_error(request.user, *lookup)
+
+        access = _build_access(obj, role)
+        request._workspace_access[lookup] = access
+        _member_roles(request)[access.workspace.pk] = access.role
+
+    request.workspace_access = access
+    return access
+
+
+def get_user_memberships(request: HttpRequest) -> list[WorkspaceMember]:
+    if not hasattr(request, "_memberships"):
+        request._memberships = list(
+            WorkspaceMember.objects.filter(user_id=request.user.pk)
+            .select_related("workspace")
+            .order_by("workspace_id")
+        )
+        roles = _member_roles(request)
+        for membership in request._memberships:
+            roles[membership.workspace_id] = membership.role
+    return request._memberships
+
+
+def get_member_role(
+    request: HttpRequest,
+    workspace: Workspace,
+    batch: bool = False,
+    required: str | None = None,
+) -> str | None:
+    """
+    With batch=True the first miss loads every role of the caller in one
+    query, so any number of later checks in the same request are free.
+    With required, a miss is answered by the rank filter and only returns
+    the role when it is at least required.
+    """
+    roles = _member_roles(request)
+    if workspace.pk in roles:
+        return roles[workspace.pk]
+    if batch or hasattr(request, "_memberships"):
+        get_user_memberships(request)
+        return roles.setdefault(workspace.pk, None)
+    if required is not None:
+        return (
+            WorkspaceMember.objects.filter(
+                user_id=request.user.pk, workspace_id=workspace.pk
+            )
+            .with_role_at_least(required)
+            .values_list("role", flat=True)
+            .first()
+        )
+    roles[workspace.pk] = membership_cache.get_role(request.user.pk, workspace.pk)
+    return roles[workspace.pk]
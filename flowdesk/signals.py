@@ -0,0 +1,106 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, pre_delete, post_save
+from django.dispatch import receiver
+
+from flowdesk.models import List, Task, WorkspaceMember
+from flowdesk.services import dependency_closure
+from flowdesk.services.graph_cache import bump_graph_version
+from flowdesk.services.membership_cache import membership_cache
+
+
+@receiver(post_save, sender=WorkspaceMember)
+@receiver(post_delete, sender=WorkspaceMember)
+def workspace_member_changed_signal(sender, instance, **kwargs):
+    invalidate = partial(
+        membership_cache.invalidate, instance.user_id, instance.workspace_id
+    )
+    invalidate()
+    # a concurrent request may re-cache the old role before we commit
+    transaction.on_commit(invalidate)
+
+
+@receiver(m2m_changed, sender=Task.blocking_tasks.through)
+def task_dependencies_changed_signal(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    # forward: instance is the blocked task and pk_set its blockers,
+    # reverse: instance is the blocker and pk_set the tasks it blocks
+    if action == "post_add":
+        if reverse:
+            edges = [(instance.pk, pk) for pk in pk_set]
+        else:
+            edges = [(pk, instance.pk) for pk in pk_set]
+        dependency_closure.add_edges(edges)
+    elif action == "post_remove":
+        dependency_closure.refresh(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        if reverse:
+            dependency_closure.refresh(dependency_closure.descendant_ids([instance.pk]))
+        else:
+            dependency_closure.refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Task)
+def task_pre_delete_signal(sender, instance, origin=None, **kwargs):
+    # a list or board delete reaches many tasks: look up what they block
+    # once, on the first of them, and keep it on the origin
+    tasks = dependency_closure.deleted_with(origin)
+    if tasks is None:
+        descendants = dependency_closure.descendant_ids([instance.pk])
+        instance._closure_descendants = descendants - {instance.pk}
+    elif not hasattr(origin, "_closure_descendants"):
+        origin._closure_descendants = dependency_closure.surviving_descendant_ids(tasks)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted_signal(sender, instance, origin=None, **kwargs):
+    owner = instance if hasattr(instance, "_closure_descendants") else origin
+    descendants = getattr(owner, "_closure_descendants", None)
+    if descendants:
+        owner._closure_descendants = set()
+        dependency_closure.refresh(descendants)
+
+
+@receiver(m2m_changed, sender=Task.blocking_tasks.through)
+def task_dependencies_graph_signal(sender, instance, action, pk_set, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_graph_version(lists__tasks__in=[instance.pk, *(pk_set or ())])
+
+
+@receiver(post_save, sender=Task)
+def task_saved_graph_signal(sender, instance, created, **kwargs):
+    loaded = getattr(instance, "_graph_fields", None)
+    current = (instance.title, instance.list_id)
+    if not created and loaded != current:
+        list_ids = {instance.list_id}
+        if loaded:
+            list_ids.add(loaded[1])
+        bump_graph_version(lists__in=list_ids)
+    instance._graph_fields = current
+
+
+@receiver(pre_delete, sender=Task)
+def task_pre_delete_graph_signal(sender, instance, origin=None, **kwargs):
+    owner = instance if origin is None else origin
+    if not hasattr(owner, "_graph_list_ids"):
+        owner._graph_list_ids = set()
+    owner._graph_list_ids.add(instance.list_id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted_graph_signal(sender, instance, origin=None, **kwargs):
+    # every pre_delete has run by now, so the first task of a delete bumps
+    # the boards of all of them
+    owner = instance if origin is None else origin
+    list_ids = getattr(owner, "_graph_list_ids", None)
+    if list_ids:
+        owner._graph_list_ids = set()
+        bump_graph_version(lists__in=list_ids)
+
+
+@receiver(post_save, sender=List)
+def list_saved_graph_signal(sender, instance, created, **kwargs):
+    if not created:
+        bump_graph_version(pk=instance.board_id)
@@ -1,14 +1,15 @@
 from django import template
-from flowdesk.models import WorkspaceMember
+from flowdesk.services.membership_cache import membership_cache
+from flowdesk.services.workspace_access import get_member_role
 
 register = template.Library()
 
 
-@register.simple_tag
-def has_workspace_role(user, workspace, *roles):
+@register.simple_tag(takes_context=True)
+def has_workspace_role(context, user, workspace, *roles):
     if not user.is_authenticated:
         return False
-    membership = WorkspaceMember.objects.filter(user=user, workspace=workspace).first()
-    if not membership:
-        return False
-    return membership.role in roles
+    request = context.get("request")
+    if request is not None and request.user == user:
+        return get_member_role(request, workspace, batch=True) in roles
+    return membership_cache.get_role(user.pk, workspace.pk) in roles
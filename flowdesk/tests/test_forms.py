@@ -114,6 +114,41 @@ class TestTaskForm(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn("title", form.errors)
 
+    def make_task(self, title):
+        return Task.objects.create(
+            title=title, list=self.lst, created_by=self.user, position=1
+        )
+
+    def edit_blockers(self, task, blockers):
+        data = {
+            "title": task.title,
+            "priority": task.priority,
+            "status": task.status,
+            "blocking_tasks": [blocker.pk for blocker in blockers],
+        }
+        return TaskForm(
+            data=data,
+            instance=task,
+            workspace=self.workspace,
+            board=self.board,
+            task=task,
+        )
+
+    def test_rejects_blockers_that_close_a_cycle(self):
+        first, second, third, other = (
+            self.make_task(title) for title in ("A", "B", "C", "D")
+        )
+        second.blocking_tasks.add(first)
+        third.blocking_tasks.add(second)
+
+        form = self.edit_blockers(first, [other, third])
+        with self.assertNumQueries(2):
+            self.assertFalse(form.is_valid())
+        self.assertIn("C", form.errors["blocking_tasks"][0])
+
+        form = self.edit_blockers(third, [first, other])
+        self.assertTrue(form.is_valid())
+
 
 class TestTagForm(TestCase):
     def setUp(self):
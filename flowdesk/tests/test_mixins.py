@@ -1,8 +1,13 @@
-from django.test import TestCase, Client
+from django.core.exceptions import PermissionDenied
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 
+from flowdesk.mixins import AdminRequiredMixin
 from flowdesk.models import Workspace, WorkspaceMember, Board, List, Task
+from django.http import HttpResponse
+from django.views import View
 from unittest.mock import patch
 
 User = get_user_model()
@@ -298,3 +303,75 @@ class TestMixins(TestCase):
             self.client.login(username=user.username, password="p")
             response = self.client.get(url)
             self.assertNotEqual(response.status_code, 200)
+
+
+class TestRoleRanks(TestCase):
+    def setUp(self):
+        self.workspace = Workspace.objects.create(name="WS", description="D")
+        self.members = {}
+        for role in WorkspaceMember.Roles:
+            user = User.objects.create_user(username=role.lower(), password="p")
+            self.members[role] = WorkspaceMember.objects.create(
+                user=user, workspace=self.workspace, role=role
+            )
+
+    def test_rank_follows_role(self):
+        member = self.members[WorkspaceMember.Roles.GUEST]
+        self.assertEqual(member.rank, WorkspaceMember.ROLE_RANKS["GUEST"])
+
+        member.role = WorkspaceMember.Roles.ADMIN
+        member.save(update_fields=["role"])
+        member.refresh_from_db()
+        self.assertEqual(member.rank, WorkspaceMember.ROLE_RANKS["ADMIN"])
+
+    def test_rank_follows_bulk_writes(self):
+        WorkspaceMember.objects.filter(role=WorkspaceMember.Roles.GUEST).update(
+            role=WorkspaceMember.Roles.OWNER
+        )
+        user = User.objects.create_user(username="bulk", password="p")
+        WorkspaceMember.objects.bulk_create(
+            [WorkspaceMember(user=user, workspace=self.workspace, role="ADMIN")]
+        )
+        self.assertEqual(
+            sorted(WorkspaceMember.objects.values_list("role", "rank")),
+            [("ADMIN", 30), ("ADMIN", 30), ("OWNER", 40), ("OWNER", 40), ("USER", 20)],
+        )
+
+    def test_role_check_without_a_loaded_role_uses_the_rank_filter(self):
+        class AdminView(AdminRequiredMixin, View):
+            def get(self, request):
+                return HttpResponse("ok")
+
+        for role, allowed in (("ADMIN", True), ("USER", False)):
+            request = RequestFactory().get("/")
+            request.user = self.members[role].user
+            view = AdminView()
+            view.setup(request)
+            view.workspace = self.workspace
+            with self.assertNumQueries(1) as queries:
+                if allowed:
+                    self.assertEqual(view.dispatch(request).status_code, 200)
+                else:
+                    with self.assertRaises(PermissionDenied):
+                        view.dispatch(request)
+            self.assertIn('"rank" >= 30', queries[0]["sql"])
+
+    def test_with_role_at_least(self):
+        roles = set(
+            WorkspaceMember.objects.with_role_at_least(
+                WorkspaceMember.Roles.ADMIN
+            ).values_list("role", flat=True)
+        )
+        self.assertEqual(roles, {"OWNER", "ADMIN"})
+
+    def test_membership_is_unique_per_user_and_workspace(self):
+        member = self.members[WorkspaceMember.Roles.USER]
+        with self.assertRaises(IntegrityError):
+            WorkspaceMember.objects.create(user=member.user, workspace=self.workspace)
+
+    def test_has_required_role(self):
+        mixin = AdminRequiredMixin()
+        self.assertTrue(mixin.has_required_role(WorkspaceMember.Roles.OWNER))
+        self.assertTrue(mixin.has_required_role(WorkspaceMember.Roles.ADMIN))
+        self.assertFalse(mixin.has_required_role(WorkspaceMember.Roles.USER))
+        self.assertFalse(mixin.has_required_role(WorkspaceMember.Roles.GUEST))
@@ -1,49 +1,506 @@
+import json
+import threading
 import unittest
+from datetime import datetime, timezone
+from io import StringIO
 from unittest.mock import MagicMock, patch
 
-from flowdesk.services import task_graph, workspace_invite
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, QueryDict
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from flowdesk.models import (
+    Workspace,
+    WorkspaceMember,
+    Board,
+    List,
+    Task,
+    TaskDependencyClosure,
+    Comment,
+)
+from flowdesk.services import (
+    board_graph,
+    board_snapshot,
+    comment_stream,
+    dependency_closure,
+    ordering,
+    schedule,
+    task_graph,
+    workspace_invite,
+    workspace_access,
+)
+from base.cache import is_shared
+from flowdesk.services.membership_cache import membership_cache
 
-class TestTaskGraphService(unittest.TestCase):
-    def make_task(self, pk, title, blockers=None, blocked=None, list_name="List"):
-        task = MagicMock()
-        task.pk = pk
-        task.title = title
-        task.list.name = list_name
-        task.blocking_tasks.all.return_value = blockers or []
-        task.tasks.all.return_value = blocked or []
-        return task
+User = get_user_model()
+
+
+class TestTaskGraphService(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=0)
+
+    def make_tasks(self, count):
+        return Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.list, created_by=self.user, position=i)
+            for i in range(count)
+        )
+
+    def build(self, task, **query):
+        queryset = Task.objects.filter(list__board=self.board).select_related("list")
+        return task_graph.build_task_graph(
+            task,
+            queryset,
+            self.workspace.pk,
+            self.board.pk,
+            task_graph.GraphQuery(**query),
+        )
+
+    def make_chain(self, count):
+        tasks = self.make_tasks(count)
+        Task.blocking_tasks.through.objects.bulk_create(
+            Task.blocking_tasks.through(from_task=blocked, to_task=blocker)
+            for blocker, blocked in zip(tasks, tasks[1:])
+        )
+        return tasks
 
-    @patch("flowdesk.services.task_graph.reverse", lambda *a, **kw: "/mock-url/")
     def test_build_task_graph_simple(self):
-        t1 = self.make_task(1, "Task 1")
-        queryset = MagicMock()
-        queryset.filter.return_value = [t1]
-        result = task_graph.build_task_graph(t1, queryset, 10, 20)
-        self.assertIn("nodes", result)
-        self.assertIn("edges", result)
-        self.assertEqual(result["nodes"][0]["id"], 1)
+        (t1,) = self.make_tasks(1)
+        result = self.build(t1)
+        self.assertEqual(len(result["nodes"]), 1)
+        self.assertEqual(result["nodes"][0]["id"], t1.pk)
         self.assertEqual(result["nodes"][0]["group"], "current")
         self.assertEqual(result["edges"], [])
 
-    @patch("flowdesk.services.task_graph.reverse", lambda *a, **kw: "/mock-url/")
     def test_build_task_graph_with_blockers_and_blocked(self):
-        t1 = self.make_task(1, "Task 1")
-        t2 = self.make_task(2, "Task 2")
-        t3 = self.make_task(3, "Task 3")
-        t1.blocking_tasks.all.return_value = [t2]
-        t1.tasks.all.return_value = [t3]
-        t2.blocking_tasks.all.return_value = []
-        t2.tasks.all.return_value = []
-        t3.blocking_tasks.all.return_value = []
-        t3.tasks.all.return_value = []
-        queryset = MagicMock()
-        queryset.filter.return_value = [t1, t2, t3]
-        result = task_graph.build_task_graph(t1, queryset, 10, 20)
-        self.assertEqual(len(result["nodes"]), 3)
-        self.assertTrue(any(n["group"] == "blockers" for n in result["nodes"]))
-        self.assertTrue(any(n["group"] == "blocked" for n in result["nodes"]))
-        self.assertTrue(any(e["from"] == 2 and e["to"] == 1 for e in result["edges"]))
+        t1, t2, t3, t4, _ = self.make_tasks(5)
+        t1.blocking_tasks.add(t2)
+        t3.blocking_tasks.add(t1)
+        t2.blocking_tasks.add(t4)
+        result = self.build(t1)
+        groups = {node["id"]: node["group"] for node in result["nodes"]}
+        self.assertEqual(
+            groups,
+            {
+                t1.pk: "current",
+                t2.pk: "blockers",
+                t3.pk: "blocked",
+                t4.pk: "related",
+            },
+        )
+        self.assertEqual(
+            {(edge["from"], edge["to"]) for edge in result["edges"]},
+            {(t2.pk, t1.pk), (t1.pk, t3.pk), (t4.pk, t2.pk)},
+        )
+
+    def test_graph_is_loaded_in_three_queries(self):
+        for count in (10, 200):
+            Task.objects.all().delete()
+            tasks = self.make_chain(count)
+            # a cycle must not keep the traversal going
+            tasks[0].blocking_tasks.add(tasks[-1])
+            with self.assertNumQueries(3):
+                result = self.build(tasks[count // 2], depth=task_graph.MAX_DEPTH)
+            self.assertEqual(
+                len(result["nodes"]), min(count, 2 * task_graph.MAX_DEPTH + 1)
+            )
+            self.assertEqual(len(result["edges"]), len(result["nodes"]) - (count > 10))
+
+    def test_depth_and_direction_bound_the_graph(self):
+        tasks = self.make_chain(9)
+        root = tasks[4]
+        result = self.build(root, depth=2)
+        self.assertEqual(
+            sorted(node["id"] for node in result["nodes"]),
+            [t.pk for t in tasks[2:7]],
+        )
+        self.assertEqual(
+            {node["id"]: node["depth"] for node in result["nodes"]}[tasks[2].pk], 2
+        )
+        self.assertEqual(result["frontier"], [tasks[2].pk, tasks[6].pk])
+        self.assertEqual(len(result["edges"]), 4)
+        self.assertIsNone(result["next"])
+
+        result = self.build(root, depth=2, direction=task_graph.BLOCKERS)
+        self.assertEqual(
+            sorted(node["id"] for node in result["nodes"]),
+            [t.pk for t in tasks[2:5]],
+        )
+        self.assertEqual(result["frontier"], [tasks[2].pk])
+
+        result = self.build(root, depth=task_graph.MAX_DEPTH, direction="blocked")
+        self.assertEqual(
+            sorted(node["id"] for node in result["nodes"]),
+            [t.pk for t in tasks[4:]],
+        )
+        self.assertEqual(result["frontier"], [])
+
+    def test_cursor_pages_through_the_graph(self):
+        root, *others = self.make_tasks(7)
+        root.tasks.add(*others)
+        others[0].tasks.add(others[1])
+
+        nodes, edges, cursor, pages = [], [], None, 0
+        while True:
+            after = tuple(map(int, cursor.split(":"))) if cursor else None
+            result = self.build(root, limit=3, after=after)
+            nodes += [node["id"] for node in result["nodes"]]
+            edges += [(edge["from"], edge["to"]) for edge in result["edges"]]
+            self.assertLessEqual(len(result["nodes"]), 3)
+            pages += 1
+            cursor = result["next"]
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(nodes[0], root.pk)
+        self.assertEqual(sorted(nodes), sorted(t.pk for t in [root, *others]))
+        self.assertEqual(len(edges), len(set(edges)))
+        self.assertEqual(
+            set(edges),
+            {(root.pk, t.pk) for t in others} | {(others[0].pk, others[1].pk)},
+        )
+
+    def test_reach_reads_at_most_max_rows(self):
+        tasks = self.make_chain(12)
+        expected = {t.pk: i for i, t in enumerate(tasks[:5])}
+        self.assertEqual(task_graph.reach(tasks[0].pk, 10, "blocked", 5), expected)
+        with patch.object(task_graph, "RECURSIVE_CTE_VENDORS", ()):
+            self.assertEqual(task_graph.reach(tasks[0].pk, 10, "blocked", 5), expected)
+
+        # the cut-off part of the component is reached through the frontier
+        result = self.build(tasks[0], depth=10, direction="blocked")
+        self.assertEqual(len(result["nodes"]), 11)
+        result = task_graph.build_task_graph(
+            tasks[0],
+            Task.objects.all(),
+            self.workspace.pk,
+            self.board.pk,
+            task_graph.GraphQuery(depth=10, direction="blocked"),
+            max_reach=5,
+        )
+        self.assertEqual([node["id"] for node in result["nodes"]], list(expected))
+        self.assertEqual(result["frontier"], [tasks[4].pk])
+        self.assertIsNone(result["next"])
+
+        root, *others = self.make_tasks(12)
+        root.tasks.add(*others)
+        self.assertEqual(len(task_graph.reach(root.pk, 1, max_rows=5)), 5)
+
+    def test_level_fallback_matches_recursive_query(self):
+        t1, t2, t3, t4, t5 = self.make_tasks(5)
+        t2.blocking_tasks.add(t1)
+        t3.blocking_tasks.add(t2, t4)
+        t4.blocking_tasks.add(t3)
+        for direction in task_graph.DIRECTIONS:
+            expected = task_graph.reach(t1.pk, 3, direction)
+            with patch.object(task_graph, "RECURSIVE_CTE_VENDORS", ()):
+                self.assertEqual(task_graph.reach(t1.pk, 3, direction), expected)
+        with patch.object(task_graph, "RECURSIVE_CTE_VENDORS", ()):
+            with self.assertNumQueries(3):
+                task_graph.reach(t1.pk, 3)
+        self.assertEqual(task_graph.reach(t1.pk, 2), {t1.pk: 0, t2.pk: 1, t3.pk: 2})
+        self.assertEqual(task_graph.reach(t1.pk, 3, "blockers"), {t1.pk: 0})
+        self.assertEqual(task_graph.reach(t5.pk, 3), {t5.pk: 0})
+
+    def test_reach_casts_the_root_to_the_id_column_type(self):
+        self.assertIn("CAST(%s AS bigint)", task_graph.REACH_SQL)
+        (t1,) = self.make_tasks(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(task_graph.reach(t1.pk, 2), {t1.pk: 0})
+        if connection.vendor in task_graph.RECURSIVE_CTE_VENDORS:
+            self.assertIn(f"CAST({t1.pk} AS bigint)", queries[0]["sql"])
+
+    def test_graph_query_from_params(self):
+        query = task_graph.GraphQuery.from_params(
+            QueryDict("depth=50&limit=0&direction=blocked&after=2:17")
+        )
+        self.assertEqual(
+            query,
+            task_graph.GraphQuery(
+                depth=task_graph.MAX_DEPTH, limit=1, direction="blocked", after=(2, 17)
+            ),
+        )
+        self.assertEqual(
+            task_graph.GraphQuery.from_params(QueryDict()), task_graph.GraphQuery()
+        )
+        for params in ("depth=x", "direction=up", "after=17"):
+            with self.assertRaises(ValueError):
+                task_graph.GraphQuery.from_params(QueryDict(params))
+
+
+class TestDependencyClosure(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=0)
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.list, created_by=self.user, position=i)
+            for i in range(6)
+        )
+
+    def closure(self):
+        return set(
+            TaskDependencyClosure.objects.values_list("ancestor_id", "descendant_id")
+        )
+
+    def expected_closure(self):
+        edges = set(
+            Task.blocking_tasks.through.objects.values_list(
+                "to_task_id", "from_task_id"
+            )
+        )
+        closure = set(edges)
+        while True:
+            extra = {(a, d) for a, b in closure for c, d in edges if b == c}
+            if extra <= closure:
+                return closure
+            closure |= extra
+
+    def test_closure_follows_m2m_changes(self):
+        t0, t1, t2, t3, t4, t5 = self.tasks
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1, t5)
+        t1.tasks.add(t3, t4)
+        self.assertEqual(self.closure(), self.expected_closure())
+        self.assertIn((t0.pk, t3.pk), self.closure())
+
+        t2.blocking_tasks.remove(t1)
+        self.assertEqual(self.closure(), self.expected_closure())
+        t1.tasks.remove(t3)
+        self.assertEqual(self.closure(), self.expected_closure())
+        t1.tasks.clear()
+        self.assertEqual(self.closure(), self.expected_closure())
+        t2.blocking_tasks.clear()
+        self.assertEqual(self.closure(), self.expected_closure())
+
+    def test_deleting_a_task_splits_the_chain(self):
+        t0, t1, t2 = self.tasks[:3]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        self.assertIn((t0.pk, t2.pk), self.closure())
+        t1.delete()
+        self.assertEqual(self.closure(), set())
+
+    def delete_list(self, size: int) -> int:
+        t0, t1 = self.tasks[:2]
+        doomed = List.objects.create(name="Doomed", board=self.board, position=1)
+        middle, *rest = Task.objects.bulk_create(
+            Task(title=f"D{i}", list=doomed, created_by=self.user, position=i)
+            for i in range(size)
+        )
+        middle.blocking_tasks.add(t0)
+        t1.blocking_tasks.add(middle)
+        rest[0].blocking_tasks.add(middle)
+        with CaptureQueriesContext(connection) as queries:
+            doomed.delete()
+        self.assertEqual(self.closure(), self.expected_closure())
+        self.assertNotIn((t0.pk, t1.pk), self.closure())
+        return len(queries)
+
+    def test_deleting_a_list_refreshes_the_closure_once(self):
+        self.assertEqual(self.delete_list(3), self.delete_list(30))
+
+    def test_deleting_a_task_queryset_refreshes_the_closure(self):
+        t0, t1, t2, t3 = self.tasks[:4]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        t3.blocking_tasks.add(t2)
+        Task.objects.filter(pk__in=[t1.pk, t2.pk]).delete()
+        self.assertEqual(self.closure(), set())
+
+    def test_cycles_are_recorded_once(self):
+        t0, t1, t2 = self.tasks[:3]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        t0.blocking_tasks.add(t2)
+        self.assertEqual(len(self.closure()), 9)
+        self.assertEqual(self.closure(), self.expected_closure())
+
+    def test_lookups_are_single_queries(self):
+        t0, t1, t2, t3 = self.tasks[:4]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        t3.blocking_tasks.add(t2)
+        with self.assertNumQueries(1):
+            self.assertEqual(set(dependency_closure.blockers_of(t3.pk)), {t0, t1, t2})
+        with self.assertNumQueries(1):
+            self.assertEqual(set(dependency_closure.blocked_by(t0.pk)), {t1, t2, t3})
+
+    def test_rebuild_command_restores_the_table(self):
+        t0, t1, t2 = self.tasks[:3]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        TaskDependencyClosure.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_task_closure", stdout=out)
+        self.assertIn("Wrote 3 closure rows.", out.getvalue())
+        self.assertEqual(self.closure(), self.expected_closure())
+
+
+class TestScheduleService(unittest.TestCase):
+    def make_graph(self, edges, **tasks):
+        rows = [
+            (
+                task_id,
+                tasks.get(f"p{task_id}", Task.Priority.LOW),
+                tasks.get(f"s{task_id}", Task.Status.TODO),
+                tasks.get(f"d{task_id}"),
+            )
+            for task_id in range(1, tasks.get("count", 6) + 1)
+        ]
+        return schedule.build_graph(rows, edges)
+
+    def test_order_respects_dependencies_and_deadlines(self):
+        graph = self.make_graph(
+            [(1, 2), (2, 3), (4, 3)],
+            d4=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            d5=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        )
+        result = schedule.build_schedule(graph)
+        self.assertEqual(result.order, [4, 5, 1, 2, 3, 6])
+        self.assertEqual(result.cyclic, [])
+        self.assertEqual(result.ready, [4, 5, 1, 6])
+
+    def test_critical_path_by_priority_and_deadline(self):
+        graph = self.make_graph(
+            [(1, 2), (2, 3), (4, 5)],
+            p4=Task.Priority.CRITICAL,
+            p5=Task.Priority.CRITICAL,
+            d2=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+        result = schedule.build_schedule(graph)
+        self.assertEqual(result.critical_path, [4, 5])
+        self.assertEqual(result.critical_weight, 10)
+
+        result = schedule.build_schedule(graph, "deadline")
+        self.assertEqual(result.critical_path, [1, 2])
+        self.assertEqual(result.critical_weight, 2)
+
+    def test_finished_tasks_free_their_dependents(self):
+        graph = self.make_graph(
+            [(1, 2), (2, 3)], s1=Task.Status.DONE, s2=Task.Status.ARCHIVED
+        )
+        result = schedule.build_schedule(graph)
+        self.assertIn(3, result.ready)
+        self.assertNotIn(1, result.ready)
+        self.assertEqual(result.critical_path, [3])
+
+    def test_cycles_are_reported(self):
+        graph = self.make_graph([(1, 2), (2, 3), (3, 2), (5, 9)])
+        result = schedule.build_schedule(graph)
+        self.assertEqual(result.cyclic, [2, 3])
+        self.assertEqual(sorted(result.order), [1, 4, 5, 6])
+        self.assertNotIn(2, result.ready)
+
+
+class TestBenchmarkCommands(TestCase):
+    def test_schedule_benchmark_rolls_its_board_back(self):
+        out = StringIO()
+        call_command("benchmark_schedule", tasks=50, edges=100, runs=1, stdout=out)
+        self.assertIn("50 tasks, 100 edges", out.getvalue())
+        self.assertFalse(Board.objects.exists())
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "benchmark_schedule", tasks=50, edges=100, budget=0, stdout=out
+            )
+
+    def test_task_graph_benchmark_builds_whole_chains(self):
+        out = StringIO()
+        call_command("benchmark_task_graph", sizes=(20, 40), runs=1, stdout=out)
+        self.assertIn("40 tasks", out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "benchmark_task_graph", sizes=(20, 40), max_ratio=0, stdout=out
+            )
+
+
+class TestBoardGraphService(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=0)
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.list, created_by=self.user, position=i)
+            for i in range(6)
+        )
+
+    def test_tasks_are_layered_after_their_blockers(self):
+        t0, t1, t2, t3, t4, _ = self.tasks
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1, t3)
+        t4.blocking_tasks.add(t0)
+        layout = board_graph.build_board_layout(self.board)
+
+        x = {node["id"]: node["x"] for node in layout["nodes"]}
+        gap = board_graph.LAYER_SPACING
+        self.assertEqual(
+            x, {t0.pk: 0, t3.pk: 0, t1.pk: gap, t4.pk: gap, t2.pk: 2 * gap}
+        )
+        for blocker, blocked in ((t0, t1), (t1, t2), (t3, t2), (t0, t4)):
+            self.assertLess(x[blocker.pk], x[blocked.pk])
+        ys = [node["y"] for node in layout["nodes"] if node["x"] == 0]
+        self.assertEqual(sorted(ys), [-60, 60])
+        self.assertEqual(len(layout["edges"]), 4)
+
+    def test_cycles_get_a_layer_of_their_own(self):
+        t0, t1, t2 = self.tasks[:3]
+        t1.blocking_tasks.add(t0)
+        t2.blocking_tasks.add(t1)
+        t1.blocking_tasks.add(t2)
+        layout = board_graph.build_board_layout(self.board)
+        x = {node["id"]: node["x"] for node in layout["nodes"]}
+        self.assertEqual(x[t0.pk], 0)
+        self.assertEqual(x[t1.pk], x[t2.pk])
+        self.assertGreater(x[t1.pk], 0)
+
+    def test_streamed_json_matches_the_layout(self):
+        for blocker, blocked in zip(self.tasks, self.tasks[1:]):
+            blocked.blocking_tasks.add(blocker)
+        page = board_graph.layout_page(board_graph.build_board_layout(self.board), 0)
+        with patch.object(board_graph, "STREAM_CHUNK_SIZE", 2):
+            chunks = list(board_graph.iter_layout_json(page))
+        self.assertGreater(len(chunks), 4)
+        self.assertEqual(json.loads("".join(chunks)), page)
+        empty = board_graph.layout_page({"nodes": [], "edges": []}, 0)
+        self.assertEqual(
+            json.loads("".join(board_graph.iter_layout_json(empty))),
+            {"nodes": [], "edges": [], "next": None},
+        )
+
+    def test_layout_pages_are_bounded(self):
+        for blocker, blocked in zip(self.tasks, self.tasks[1:]):
+            blocked.blocking_tasks.add(blocker)
+        layout = board_graph.build_board_layout(self.board)
+        pages = []
+        with (
+            patch.object(board_graph, "PAGE_NODES", 4),
+            patch.object(board_graph, "PAGE_EDGES", 2),
+        ):
+            page = board_graph.layout_page(layout, 0)
+            while True:
+                pages.append(page)
+                if page["next"] is None:
+                    break
+                page = board_graph.layout_page(layout, page["next"])
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(
+            all(len(p["nodes"]) <= 4 and len(p["edges"]) <= 2 for p in pages)
+        )
+        self.assertEqual([n for p in pages for n in p["nodes"]], layout["nodes"])
+        self.assertEqual([e for p in pages for e in p["edges"]], layout["edges"])
 
 
 class TestWorkspaceInviteService(unittest.TestCase):
@@ -68,3 +525,470 @@ class TestWorkspaceInviteService(unittest.TestCase):
         invited_user.pk = 99
         link = workspace_invite.generate_invite_link(request, workspace, invited_user)
         self.assertEqual(link, "http://testserver/join/42/uidb64/token123")
+
+
+class TestWorkspaceAccessService(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.outsider = User.objects.create_user(username="outsider", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        WorkspaceMember.objects.create(
+            user=self.user, workspace=self.workspace, role=WorkspaceMember.Roles.ADMIN
+        )
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=1)
+        self.task = Task.objects.create(
+            title="T", list=self.list, created_by=self.user, position=1
+        )
+        self.factory = RequestFactory()
+
+    def make_request(self, user):
+        request = self.factory.get("/")
+        request.user = user
+        return request
+
+    def test_resolves_whole_chain_in_one_query(self):
+        request = self.make_request(self.user)
+        with self.assertNumQueries(1):
+            access = workspace_access.resolve_workspace_access(
+                request,
+                workspace_pk=self.workspace.pk,
+                board_pk=self.board.pk,
+                list_pk=self.list.pk,
+                task_pk=self.task.pk,
+            )
+            self.assertEqual(access.task, self.task)
+            self.assertEqual(access.list, self.list)
+            self.assertEqual(access.board, self.board)
+            self.assertEqual(access.workspace, self.workspace)
+            self.assertEqual(access.role, WorkspaceMember.Roles.ADMIN)
+
+    def test_access_is_memoized_per_request(self):
+        request = self.make_request(self.user)
+        workspace_access.resolve_workspace_access(
+            request, workspace_pk=self.workspace.pk, board_pk=self.board.pk
+        )
+        with self.assertNumQueries(0):
+            workspace_access.resolve_workspace_access(
+                request, workspace_pk=self.workspace.pk, board_pk=self.board.pk
+            )
+            role = workspace_access.get_member_role(request, self.workspace)
+        self.assertEqual(role, WorkspaceMember.Roles.ADMIN)
+        self.assertEqual(request.workspace_access.board, self.board)
+
+    def test_outsider_is_denied(self):
+        request = self.make_request(self.outsider)
+        with self.assertRaises(PermissionDenied):
+            workspace_access.resolve_workspace_access(
+                request, workspace_pk=self.workspace.pk, board_pk=self.board.pk
+            )
+
+    def test_object_from_another_workspace_is_denied(self):
+        other = Workspace.objects.create(name="Other")
+        WorkspaceMember.objects.create(user=self.user, workspace=other)
+        request = self.make_request(self.user)
+        with self.assertRaises(PermissionDenied):
+            workspace_access.resolve_workspace_access(
+                request, workspace_pk=other.pk, board_pk=self.board.pk
+            )
+
+    def test_missing_object_raises_404(self):
+        request = self.make_request(self.user)
+        with self.assertRaises(Http404):
+            workspace_access.resolve_workspace_access(
+                request, workspace_pk=self.workspace.pk, board_pk=self.board.pk + 1
+            )
+
+
+class TestMembershipCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership_cache.clear()
+        # the test cache is process-local; act as if it were shared
+        enabled = patch.object(type(membership_cache), "enabled", True)
+        enabled.start()
+        self.addCleanup(enabled.stop)
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.membership = WorkspaceMember.objects.create(
+            user=self.user, workspace=self.workspace, role=WorkspaceMember.Roles.USER
+        )
+
+    def test_counts_hits_and_misses(self):
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                role = membership_cache.get_role(self.user.pk, self.workspace.pk)
+        self.assertEqual(role, WorkspaceMember.Roles.USER)
+        stats = membership_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+
+    def test_shared_cache_serves_after_local_eviction(self):
+        membership_cache.get_role(self.user.pk, self.workspace.pk)
+        membership_cache._local.clear()
+        with self.assertNumQueries(0):
+            role = membership_cache.get_role(self.user.pk, self.workspace.pk)
+        self.assertEqual(role, WorkspaceMember.Roles.USER)
+        self.assertEqual(membership_cache.stats()["shared_hits"], 1)
+
+    def test_caches_missing_membership(self):
+        outsider = User.objects.create_user(username="outsider", password="p")
+        membership_cache.get_role(outsider.pk, self.workspace.pk)
+        with self.assertNumQueries(0):
+            role = membership_cache.get_role(outsider.pk, self.workspace.pk)
+        self.assertIsNone(role)
+
+    def test_save_invalidates(self):
+        membership_cache.get_role(self.user.pk, self.workspace.pk)
+        self.membership.role = WorkspaceMember.Roles.ADMIN
+        self.membership.save()
+        self.assertEqual(
+            membership_cache.get_role(self.user.pk, self.workspace.pk),
+            WorkspaceMember.Roles.ADMIN,
+        )
+
+    def test_delete_invalidates(self):
+        membership_cache.get_role(self.user.pk, self.workspace.pk)
+        self.membership.delete()
+        self.assertIsNone(membership_cache.get_role(self.user.pk, self.workspace.pk))
+
+    def test_process_local_cache_is_never_trusted(self):
+        # the test settings use the default LocMemCache
+        self.assertFalse(is_shared())
+        with patch.object(type(membership_cache), "enabled", is_shared()):
+            membership_cache.get_role(self.user.pk, self.workspace.pk)
+            WorkspaceMember.objects.filter(pk=self.membership.pk).update(
+                role=WorkspaceMember.Roles.GUEST
+            )
+            with self.assertNumQueries(1):
+                role = membership_cache.get_role(self.user.pk, self.workspace.pk)
+        self.assertEqual(role, WorkspaceMember.Roles.GUEST)
+        self.assertEqual(membership_cache.stats()["local_size"], 0)
+
+    def test_local_lru_is_bounded(self):
+        with patch.object(membership_cache, "LOCAL_MAX_SIZE", 2):
+            for workspace_id in range(5):
+                membership_cache.set(self.user.pk, workspace_id, "USER")
+            self.assertEqual(membership_cache.stats()["local_size"], 2)
+
+
+class TestBoardSnapshotService(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.lists = [
+            List.objects.create(name=f"L{i}", board=self.board, position=i)
+            for i in range(4)
+        ]
+
+    def make_tasks(self, count):
+        Task.objects.bulk_create(
+            Task(
+                title=f"T{i}",
+                list=self.lists[i % len(self.lists)],
+                created_by=self.user,
+                position=i,
+            )
+            for i in range(count)
+        )
+
+    def test_query_count_is_constant(self):
+        for count in (10, 100, 1000):
+            with self.subTest(count=count):
+                Task.objects.all().delete()
+                self.make_tasks(count)
+                with self.assertNumQueries(2):
+                    lists = board_snapshot.build_board_snapshot(
+                        self.board, per_list=count
+                    )
+                self.assertEqual(sum(len(lst.tasks) for lst in lists), count)
+
+    def test_lists_are_windowed(self):
+        self.make_tasks(40)
+        lists = board_snapshot.build_board_snapshot(self.board, per_list=4)
+        for lst in lists:
+            self.assertEqual(len(lst.tasks), 4)
+            self.assertEqual(
+                lst.next_cursor, board_snapshot.encode_cursor(lst.tasks[-1])
+            )
+
+        lists = board_snapshot.build_board_snapshot(self.board, per_list=10)
+        self.assertTrue(all(lst.next_cursor is None for lst in lists))
+
+    def test_first_page_and_cursor_split_equal_positions(self):
+        self.make_tasks(40)
+        Task.objects.update(position=7)
+        with CaptureQueriesContext(connection) as queries:
+            lists = board_snapshot.build_board_snapshot(self.board, per_list=4)
+        self.assertNotIn("ROW_NUMBER", queries.captured_queries[-1]["sql"])
+
+        lst = List.objects.select_related("board").get(pk=self.lists[0].pk)
+        seen = [card.id for card in lists[0].tasks]
+        cursor = board_snapshot.decode_cursor(lists[0].next_cursor)
+        while cursor is not None:
+            cards, next_cursor = board_snapshot.load_list_cards(lst, cursor, limit=4)
+            seen.extend(card.id for card in cards)
+            cursor = next_cursor and board_snapshot.decode_cursor(next_cursor)
+        self.assertEqual(
+            seen, sorted(Task.objects.filter(list=lst).values_list("pk", flat=True))
+        )
+
+    def test_load_list_cards_walks_every_card_once(self):
+        self.make_tasks(40)
+        Task.objects.filter(list=self.lists[0]).update(position=7)
+        lst = List.objects.select_related("board").get(pk=self.lists[0].pk)
+
+        seen = []
+        cursor = None
+        while True:
+            cards, next_cursor = board_snapshot.load_list_cards(lst, cursor, limit=3)
+            seen.extend(card.id for card in cards)
+            if next_cursor is None:
+                break
+            cursor = board_snapshot.decode_cursor(next_cursor)
+
+        expected = list(
+            Task.objects.filter(list=lst)
+            .order_by("position", "pk")
+            .values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_cards_do_not_load_descriptions(self):
+        self.make_tasks(3)
+        with CaptureQueriesContext(connection) as queries:
+            lists = board_snapshot.build_board_snapshot(self.board)
+        self.assertNotIn("description", queries.captured_queries[-1]["sql"])
+        card = lists[0].tasks[0]
+        self.assertEqual(card.priority_label, "Low")
+        self.assertEqual(card.status_label, "To Do")
+        self.assertIsNone(card.deadline)
+
+    def test_records_carry_precomputed_urls(self):
+        self.make_tasks(5)
+        lists = board_snapshot.build_board_snapshot(self.board)
+        self.assertEqual([lst.id for lst in lists], [lst.pk for lst in self.lists])
+
+        task = lists[1].tasks[0]
+        self.assertEqual(
+            task.url,
+            reverse(
+                "flowdesk:task-detail",
+                args=(self.workspace.pk, self.board.pk, self.lists[1].pk, task.id),
+            ),
+        )
+        self.assertEqual(
+            lists[1].create_task_url,
+            reverse(
+                "flowdesk:task-create",
+                args=(self.workspace.pk, self.board.pk, self.lists[1].pk),
+            ),
+        )
+        self.assertEqual(
+            [t.position for t in lists[0].tasks],
+            sorted(t.position for t in lists[0].tasks),
+        )
+
+
+class TestCommentStream(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        workspace = Workspace.objects.create(name="WS")
+        board = Board.objects.create(name="B", workspace=workspace)
+        lst = List.objects.create(name="L", board=board, position=0)
+        self.task = Task.objects.create(
+            title="T", list=lst, created_by=self.user, position=0
+        )
+
+    def test_pages_walk_every_comment_once(self):
+        Comment.objects.bulk_create(
+            Comment(text=f"C{i}", task=self.task, created_by=self.user)
+            for i in range(45)
+        )
+        # comments created in the same instant are told apart by id
+        stamp = Comment.objects.order_by("pk")[10].created_at
+        Comment.objects.filter(
+            pk__in=Comment.objects.order_by("pk")[:20].values("pk")
+        ).update(created_at=stamp)
+
+        seen, cursor, sizes = [], None, []
+        while True:
+            before = comment_stream.decode_cursor(cursor) if cursor else None
+            with self.assertNumQueries(1):
+                comments, cursor = comment_stream.load_comments(self.task, before)
+                [comment.created_by.username for comment in comments]
+            seen += [comment.pk for comment in comments]
+            sizes.append(len(comments))
+            if cursor is None:
+                break
+        self.assertEqual(sizes, [20, 20, 5])
+        self.assertEqual(
+            seen,
+            list(
+                Comment.objects.order_by("-created_at", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ("", "2026-01-01", "yesterday|3", "2026-01-01|x"):
+            with self.assertRaises(ValueError):
+                comment_stream.decode_cursor(cursor)
+
+
+class TestOrderingService(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="p")
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=0)
+        self.other_list = List.objects.create(name="O", board=self.board, position=1)
+
+    def make_tasks(self, positions):
+        return Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.list, created_by=self.user, position=position)
+            for i, position in enumerate(positions)
+        )
+
+    def titles(self):
+        return list(
+            Task.objects.filter(list=self.list)
+            .order_by("position", "pk")
+            .values_list("title", flat=True)
+        )
+
+    def test_move_into_gap_writes_one_row(self):
+        before, after = self.make_tasks([0, 10])
+        moved = Task.objects.create(
+            title="moved", list=self.other_list, created_by=self.user, position=0
+        )
+        with CaptureQueriesContext(connection) as queries:
+            ordering.move_task(moved, self.list.pk, before, after)
+        writes = [
+            q
+            for q in queries.captured_queries
+            if q["sql"].startswith('UPDATE "flowdesk_task"')
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.titles(), ["T0", "moved", "T1"])
+        self.assertEqual(Task.objects.get(pk=after.pk).position, 10)
+
+    def test_move_to_end_raises_the_counter(self):
+        (task,) = self.make_tasks([5 * ordering.POSITION_GAP])
+        ordering.move_task(task, self.other_list.pk, None, None)
+        moved_after = Task.objects.create(
+            title="X", list=self.other_list, created_by=self.user, position=0
+        )
+        ordering.move_task(moved_after, self.other_list.pk, task, None)
+        self.other_list.refresh_from_db()
+        self.assertEqual(self.other_list.last_task_position, moved_after.position)
+        self.assertGreater(
+            ordering.next_task_position(self.other_list.pk), moved_after.position
+        )
+
+    def test_rebalance_command_syncs_counters(self):
+        self.make_tasks([0, 1, 2])
+        call_command("rebalance_positions", board=[self.board.pk], stdout=StringIO())
+        self.list.refresh_from_db()
+        self.assertEqual(self.list.last_task_position, 3 * ordering.POSITION_GAP)
+        self.assertEqual(self.titles(), ["T0", "T1", "T2"])
+
+    def test_position_between(self):
+        gap = ordering.POSITION_GAP
+        self.assertEqual(ordering.position_between(None, None), gap)
+        self.assertEqual(ordering.position_between(None, gap), 0)
+        self.assertEqual(ordering.position_between(gap, None), 2 * gap)
+        self.assertEqual(ordering.position_between(0, 10), 5)
+        self.assertIsNone(ordering.position_between(4, 5))
+        self.assertIsNone(ordering.position_between(4, 4))
+
+    def test_exhausted_gap_rebalances_the_list(self):
+        tasks = self.make_tasks([0, 1, 2, 3])
+        ordering.move_task(tasks[3], self.list.pk, tasks[0], tasks[1])
+        self.assertEqual(self.titles(), ["T0", "T3", "T1", "T2"])
+        positions = list(
+            Task.objects.filter(list=self.list)
+            .order_by("position")
+            .values_list("position", flat=True)
+        )
+        self.assertTrue(
+            all(b - a > 1 for a, b in zip(positions, positions[1:])), positions
+        )
+
+    def test_move_between_tied_cards(self):
+        tasks = self.make_tasks([0, 1, 1, 2])
+        ordering.move_task(tasks[3], self.list.pk, tasks[1], tasks[2])
+        self.assertEqual(self.titles(), ["T0", "T1", "T3", "T2"])
+
+    def test_repeated_inserts_at_the_same_spot(self):
+        first, last = self.make_tasks([0, ordering.POSITION_GAP])
+        for i in range(40):
+            task = Task.objects.create(
+                title=f"N{i}", list=self.other_list, created_by=self.user, position=0
+            )
+            ordering.move_task(task, self.list.pk, first, last)
+            last = task
+        titles = self.titles()
+        self.assertEqual(titles[0], "T0")
+        self.assertEqual(titles[-1], "T1")
+        self.assertEqual(titles[1:-1], [f"N{i}" for i in reversed(range(40))])
+
+    def test_move_list(self):
+        lists = [self.list, self.other_list]
+        lists.append(List.objects.create(name="X", board=self.board, position=2))
+        ordering.move_list(lists[2], None, lists[0])
+        self.assertEqual(
+            list(self.board.lists.order_by("position").values_list("name", flat=True)),
+            ["X", "L", "O"],
+        )
+
+
+class TestPositionAllocation(TransactionTestCase):
+    def setUp(self):
+        self.workspace = Workspace.objects.create(name="WS")
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.list = List.objects.create(name="L", board=self.board, position=0)
+
+    def allocate_concurrently(self, allocate, workers=8, rounds=5):
+        positions, errors = [], []
+        barrier = threading.Barrier(workers)
+
+        def work():
+            try:
+                barrier.wait()
+                for _ in range(rounds):
+                    positions.append(allocate())
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return positions
+
+    def test_parallel_task_positions_are_unique(self):
+        positions = self.allocate_concurrently(
+            lambda: ordering.next_task_position(self.list.pk)
+        )
+        gap = ordering.POSITION_GAP
+        self.assertEqual(sorted(positions), [gap * i for i in range(1, 41)])
+
+    def test_parallel_list_positions_are_unique(self):
+        positions = self.allocate_concurrently(
+            lambda: ordering.next_list_position(self.board.pk)
+        )
+        self.assertEqual(len(set(positions)), 40)
+
+    def test_allocation_skips_the_aggregate(self):
+        with CaptureQueriesContext(connection) as queries:
+            ordering.next_task_position(self.list.pk)
+        self.assertFalse(
+            any("MAX(" in q["sql"].upper() for q in queries.captured_queries)
+        )
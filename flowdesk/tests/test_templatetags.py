@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from flowdesk.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class TestHasWorkspaceRole(TestCase):
+    template = Template(
+        "{% load workspace_tags %}"
+        "{% for ws in workspaces %}"
+        '{% has_workspace_role user ws "OWNER" "ADMIN" as can_edit %}'
+        '{% has_workspace_role user ws "GUEST" as is_guest %}'
+        "{{ ws.pk }}:{{ can_edit }}:{{ is_guest }};"
+        "{% endfor %}"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="u", password="p")
+        self.factory = RequestFactory()
+
+    def make_workspaces(self, count):
+        workspaces = []
+        for i in range(count):
+            workspace = Workspace.objects.create(name=f"WS {i}")
+            if i % 3 == 0:
+                WorkspaceMember.objects.create(
+                    user=self.user,
+                    workspace=workspace,
+                    role=WorkspaceMember.Roles.OWNER,
+                )
+            elif i % 3 == 1:
+                WorkspaceMember.objects.create(
+                    user=self.user,
+                    workspace=workspace,
+                    role=WorkspaceMember.Roles.GUEST,
+                )
+            workspaces.append(workspace)
+        return workspaces
+
+    def render(self, workspaces):
+        request = self.factory.get("/")
+        request.user = self.user
+        return self.template.render(
+            Context({"request": request, "user": self.user, "workspaces": workspaces})
+        )
+
+    def test_query_count_stays_flat(self):
+        for count in (3, 30, 90):
+            with self.subTest(count=count):
+                Workspace.objects.all().delete()
+                workspaces = self.make_workspaces(count)
+                with self.assertNumQueries(1):
+                    self.render(workspaces)
+
+    def test_roles_are_resolved_per_workspace(self):
+        owner_ws, guest_ws, foreign_ws = self.make_workspaces(3)
+        output = self.render([owner_ws, guest_ws, foreign_ws])
+        self.assertIn(f"{owner_ws.pk}:True:False;", output)
+        self.assertIn(f"{guest_ws.pk}:False:True;", output)
+        self.assertIn(f"{foreign_ws.pk}:False:False;", output)
+
+    def test_other_user_is_checked_against_their_own_role(self):
+        other = User.objects.create_user(username="other", password="p")
+        (workspace,) = self.make_workspaces(1)
+        request = self.factory.get("/")
+        request.user = self.user
+        output = Template(
+            "{% load workspace_tags %}"
+            '{% has_workspace_role other ws "OWNER" as is_owner %}{{ is_owner }}'
+        ).render(Context({"request": request, "other": other, "ws": workspace}))
+        self.assertEqual(output, "False")
@@ -1,8 +1,15 @@
+import json
+
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from flowdesk.models import Workspace, WorkspaceMember
+from flowdesk.models import Workspace, WorkspaceMember, Board, List, Task, Comment
+from flowdesk.services.board_snapshot import CARDS_PER_PAGE
+from flowdesk.services.comment_stream import COMMENTS_PER_PAGE
 from unittest.mock import patch
 
 User = get_user_model()
@@ -24,6 +31,24 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.user.username)
 
+    def test_workspace_members_view_queries_do_not_grow_with_members(self):
+        url = reverse("flowdesk:workspace-members", args=(self.workspace.pk,))
+        query_counts = []
+        for count in (1, 10):
+            WorkspaceMember.objects.bulk_create(
+                WorkspaceMember(
+                    user=User.objects.create_user(username=f"m{count}-{i}"),
+                    workspace=self.workspace,
+                    role=WorkspaceMember.Roles.USER,
+                )
+                for i in range(count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1], query_counts)
+
     def test_workspace_members_view_post(self):
         url = reverse("flowdesk:workspace-members", args=(self.workspace.pk,))
         data = {
@@ -74,3 +99,520 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         tags = self.workspace.tags.all()
         self.assertEqual(tags.count(), 1)
+
+
+class BoardViewTestCase(TestCase):
+    """
+    An owner signed in to a board with three empty lists.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="p")
+        self.workspace = Workspace.objects.create(name="WS", description="D")
+        WorkspaceMember.objects.create(
+            user=self.user, workspace=self.workspace, role=WorkspaceMember.Roles.OWNER
+        )
+        self.board = Board.objects.create(name="B", workspace=self.workspace)
+        self.lists = [
+            List.objects.create(name=f"L{i}", board=self.board, position=i)
+            for i in range(3)
+        ]
+        self.client.login(username="u", password="p")
+
+    def board_version(self):
+        return Board.objects.values_list("version", flat=True).get(pk=self.board.pk)
+
+    def post_move(self, task, lst, before=None, after=None, version=None):
+        url = reverse(
+            "flowdesk:update-task-order", args=(self.workspace.pk, self.board.pk)
+        )
+        payload = {
+            "task": task.pk,
+            "list": lst.pk,
+            "before": before and before.pk,
+            "after": after and after.pk,
+            "version": self.board_version() if version is None else version,
+        }
+        return self.client.post(url, payload, content_type="application/json")
+
+
+class TestBoardDetailView(BoardViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse(
+            "flowdesk:board-detail", args=(self.workspace.pk, self.board.pk)
+        )
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        query_counts = []
+        for count in (10, 100, 1000):
+            Task.objects.all().delete()
+            Task.objects.bulk_create(
+                Task(
+                    title=f"T{i}",
+                    list=self.lists[i % 3],
+                    created_by=self.user,
+                    position=i,
+                )
+                for i in range(count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(
+                response,
+                'class="card mb-2',
+                count=min(count, CARDS_PER_PAGE * len(self.lists)),
+            )
+            query_counts.append(len(queries))
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+
+class TestTaskCards(BoardViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse(
+            "flowdesk:board-detail", args=(self.workspace.pk, self.board.pk)
+        )
+
+    def test_task_cards_endpoint_pages_through_a_list(self):
+        Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(CARDS_PER_PAGE + 5)
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "load-more-tasks")
+
+        url = reverse(
+            "flowdesk:task-cards",
+            args=(self.workspace.pk, self.board.pk, self.lists[0].pk),
+        )
+        last = Task.objects.get(position=CARDS_PER_PAGE - 1)
+        response = self.client.get(url, {"after": f"{last.position}:{last.pk}"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIsNone(data["next"])
+        self.assertEqual(data["html"].count('class="card mb-2'), 5)
+
+        response = self.client.get(url, {"after": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestTaskComments(BoardViewTestCase):
+    def test_task_detail_renders_one_page_of_comments(self):
+        task = Task.objects.create(
+            title="T", list=self.lists[0], created_by=self.user, position=0
+        )
+        Comment.objects.bulk_create(
+            Comment(text=f"C{i}", task=task, created_by=self.user)
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        args = (self.workspace.pk, self.board.pk, self.lists[0].pk, task.pk)
+        response = self.client.get(reverse("flowdesk:task-detail", args=args))
+        self.assertEqual(len(response.context["comments"]), COMMENTS_PER_PAGE)
+        self.assertContains(response, "comment-item", count=COMMENTS_PER_PAGE)
+        cursor = response.context["comments_next"]
+
+        url = reverse("flowdesk:comment-list", args=args)
+        data = self.client.get(url, {"before": cursor}).json()
+        self.assertIsNone(data["next"])
+        self.assertEqual(data["html"].count("comment-item"), 5)
+        self.assertIn("C0", data["html"])
+
+        response = self.client.get(url, {"before": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_comment_authors_do_not_add_queries(self):
+        task = Task.objects.create(
+            title="T", list=self.lists[0], created_by=self.user, position=0
+        )
+        url = reverse(
+            "flowdesk:task-detail",
+            args=(self.workspace.pk, self.board.pk, self.lists[0].pk, task.pk),
+        )
+        query_counts = []
+        for authors in (1, COMMENTS_PER_PAGE):
+            users = [
+                User.objects.create_user(username=f"a{authors}-{i}", password="p")
+                for i in range(authors)
+            ]
+            Comment.objects.bulk_create(
+                Comment(text=f"C{i}", task=task, created_by=users[i % authors])
+                for i in range(COMMENTS_PER_PAGE)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertContains(response, "comment-item", count=COMMENTS_PER_PAGE)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1], query_counts)
+
+
+class TestTaskOrderUpdate(BoardViewTestCase):
+    def list_titles(self, lst):
+        return list(
+            Task.objects.filter(list=lst)
+            .order_by("position", "pk")
+            .values_list("title", flat=True)
+        )
+
+    def test_task_order_moves_a_single_card(self):
+        tasks = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(5)
+        )
+        moved = Task.objects.create(
+            title="moved", list=self.lists[1], created_by=self.user, position=0
+        )
+
+        response = self.post_move(moved, self.lists[0], tasks[0], tasks[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"version": 1})
+        self.assertEqual(
+            self.list_titles(self.lists[0]), ["T0", "moved", "T1", "T2", "T3", "T4"]
+        )
+
+        response = self.post_move(moved, self.lists[2])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.list_titles(self.lists[2]), ["moved"])
+
+        response = self.post_move(tasks[4], self.lists[0], after=tasks[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board_version(), 3)
+        self.assertEqual(
+            self.list_titles(self.lists[0]), ["T4", "T0", "T1", "T2", "T3"]
+        )
+
+    def test_task_order_rejects_bad_moves(self):
+        task = Task.objects.create(
+            title="T", list=self.lists[0], created_by=self.user, position=0
+        )
+        other = Task.objects.create(
+            title="O", list=self.lists[1], created_by=self.user, position=0
+        )
+        url = reverse(
+            "flowdesk:update-task-order", args=(self.workspace.pk, self.board.pk)
+        )
+        response = self.client.post(url, {"moves": []}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        # the neighbour is not in the target list
+        response = self.post_move(task, self.lists[2], before=other)
+        self.assertEqual(response.status_code, 400)
+
+        foreign_board = Board.objects.create(name="F", workspace=self.workspace)
+        foreign_list = List.objects.create(name="F", board=foreign_board, position=0)
+        response = self.post_move(task, foreign_list)
+        self.assertEqual(response.status_code, 400)
+
+    def test_stale_task_move_returns_its_lists_and_every_list_changed_since(self):
+        tasks = Task.objects.bulk_create(
+            Task(
+                title=f"T{i}", list=self.lists[i // 2], created_by=self.user, position=i
+            )
+            for i in range(4)
+        )
+        self.assertEqual(self.post_move(tasks[0], self.lists[0]).status_code, 200)
+        response = self.post_move(tasks[2], self.lists[1], tasks[3])
+        self.assertEqual(response.status_code, 200)
+        response = self.post_move(tasks[3], self.lists[2])
+        self.assertEqual(response.status_code, 200)
+
+        # a second client still holding version 1 moves a card
+        response = self.post_move(tasks[1], self.lists[0], tasks[0], version=1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json(),
+            {
+                "version": 3,
+                "lists": [lst.pk for lst in self.lists],
+                # the rejected move's own list is sent to undo it
+                "tasks": {
+                    str(self.lists[0].pk): [tasks[1].pk, tasks[0].pk],
+                    str(self.lists[1].pk): [tasks[2].pk],
+                    str(self.lists[2].pk): [tasks[3].pk],
+                },
+            },
+        )
+        self.assertEqual(self.list_titles(self.lists[0]), ["T1", "T0"])
+
+        response = self.post_move(tasks[1], self.lists[0], tasks[0], version=0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.json()["tasks"]), 3)
+
+        # a card moved between two lists nobody else touched since
+        response = self.post_move(tasks[2], self.lists[1], version=3)
+        self.assertEqual(response.status_code, 200)
+        response = self.post_move(tasks[1], self.lists[2], version=3)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["tasks"],
+            {
+                str(self.lists[0].pk): [tasks[1].pk, tasks[0].pk],
+                str(self.lists[1].pk): [tasks[2].pk],
+                str(self.lists[2].pk): [tasks[3].pk],
+            },
+        )
+
+
+class TestListOrderUpdate(BoardViewTestCase):
+    def test_list_order_moves_a_single_list(self):
+        url = reverse(
+            "flowdesk:update-list-order", args=(self.workspace.pk, self.board.pk)
+        )
+        payload = {
+            "list": self.lists[2].pk,
+            "before": None,
+            "after": self.lists[0].pk,
+            "version": 0,
+        }
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.board.lists.order_by("position").values_list("name", flat=True)),
+            ["L2", "L0", "L1"],
+        )
+
+    def test_stale_list_move_is_rejected(self):
+        url = reverse(
+            "flowdesk:update-list-order", args=(self.workspace.pk, self.board.pk)
+        )
+        Board.objects.filter(pk=self.board.pk).update(version=4)
+        payload = {"list": self.lists[2].pk, "after": self.lists[0].pk, "version": 3}
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["version"], 4)
+        self.assertEqual(response.json()["tasks"], {})
+        self.assertEqual(
+            list(self.board.lists.order_by("position").values_list("name", flat=True)),
+            ["L0", "L1", "L2"],
+        )
+
+        del payload["version"]
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TestTaskGraphView(BoardViewTestCase):
+    def graph_url(self, task, query=""):
+        url = reverse(
+            "flowdesk:task-graph-data",
+            args=(self.workspace.pk, self.board.pk, task.pk),
+        )
+        return f"{url}?{query}" if query else url
+
+    def test_task_graph_queries_do_not_grow_with_the_chain(self):
+        query_counts = []
+        for count in (5, 50):
+            Task.objects.all().delete()
+            tasks = Task.objects.bulk_create(
+                Task(
+                    title=f"T{i}", list=self.lists[0], created_by=self.user, position=i
+                )
+                for i in range(count)
+            )
+            for blocker, blocked in zip(tasks, tasks[1:]):
+                blocked.blocking_tasks.add(blocker)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.graph_url(tasks[0], "depth=10"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["nodes"]), min(count, 11))
+            query_counts.append(len(queries))
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+    def test_task_graph_query_parameters(self):
+        tasks = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(5)
+        )
+        for blocker, blocked in zip(tasks, tasks[1:]):
+            blocked.blocking_tasks.add(blocker)
+
+        response = self.client.get(self.graph_url(tasks[2], "depth=1&limit=2"))
+        payload = response.json()
+        self.assertEqual(len(payload["nodes"]), 2)
+        self.assertEqual(payload["frontier"], [tasks[1].pk])
+        self.assertEqual(payload["next"], f"1:{tasks[1].pk}")
+
+        second = self.client.get(
+            self.graph_url(tasks[2], f"depth=1&limit=2&after={payload['next']}")
+        )
+        self.assertEqual([node["id"] for node in second.json()["nodes"]], [tasks[3].pk])
+        self.assertNotEqual(second["ETag"], response["ETag"])
+
+        for query in ("depth=deep", "direction=sideways", "after=oops"):
+            response = self.client.get(self.graph_url(tasks[2], query))
+            self.assertEqual(response.status_code, 400)
+
+    def test_task_graph_page_points_at_the_json_endpoint(self):
+        task = Task.objects.create(
+            title="T", list=self.lists[0], created_by=self.user, position=0
+        )
+        url = reverse(
+            "flowdesk:task-graph",
+            args=(self.workspace.pk, self.board.pk, self.lists[0].pk, task.pk),
+        )
+        response = self.client.get(url)
+        self.assertContains(response, self.graph_url(task))
+
+    def test_repeat_graph_requests_skip_the_task_tables(self):
+        first, second = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(2)
+        )
+        second.blocking_tasks.add(first)
+        url = self.graph_url(first)
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(len(response.json()["edges"]), 1)
+
+        for headers in ({"HTTP_IF_NONE_MATCH": etag}, {}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, **headers)
+            self.assertFalse(
+                any("flowdesk_task" in q["sql"] for q in queries.captured_queries)
+            )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        first.title = "Renamed"
+        first.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Renamed", response.json()["edges"][0]["title"])
+
+    def test_graph_version_follows_graph_changes(self):
+        first, second = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(2)
+        )
+
+        def version():
+            return Board.objects.get(pk=self.board.pk).graph_version
+
+        start = version()
+        second.blocking_tasks.add(first)
+        self.assertEqual(version(), start + 1)
+        first.tasks.remove(second)
+        self.assertEqual(version(), start + 2)
+
+        task = Task.objects.get(pk=first.pk)
+        task.status = Task.Status.DONE
+        task.save()
+        self.assertEqual(version(), start + 2)
+
+        self.post_move(task, self.lists[1])
+        self.assertEqual(version(), start + 3)
+        self.lists[1].name = "Renamed"
+        self.lists[1].save()
+        self.assertEqual(version(), start + 4)
+
+        response = self.client.get(self.graph_url(Task(pk=0)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_delete_bumps_the_graph_version_once(self):
+        Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(20)
+        )
+        start = Board.objects.get(pk=self.board.pk).graph_version
+        with CaptureQueriesContext(connection) as queries:
+            self.lists[0].delete()
+        bumps = [q for q in queries if "graph_version" in q["sql"]]
+        self.assertEqual(len(bumps), 1)
+        self.assertEqual(Board.objects.get(pk=self.board.pk).graph_version, start + 1)
+
+
+class TestBoardGraphView(BoardViewTestCase):
+    def test_board_graph_streams_a_cached_layout(self):
+        first, second = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(2)
+        )
+        second.blocking_tasks.add(first)
+        page = self.client.get(
+            reverse("flowdesk:board-graph", args=(self.workspace.pk, self.board.pk))
+        )
+        url = reverse(
+            "flowdesk:board-graph-data", args=(self.workspace.pk, self.board.pk)
+        )
+        self.assertContains(page, url)
+
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        layout = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            [(node["id"], node["x"]) for node in layout["nodes"]],
+            [(first.pk, 0), (second.pk, 250)],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            b"".join(response.streaming_content)
+        self.assertFalse(
+            any("flowdesk_task" in q["sql"] for q in queries.captured_queries)
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_board_graph_is_paged(self):
+        tasks = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(5)
+        )
+        for blocker, blocked in zip(tasks, tasks[1:]):
+            blocked.blocking_tasks.add(blocker)
+        url = reverse(
+            "flowdesk:board-graph-data", args=(self.workspace.pk, self.board.pk)
+        )
+
+        nodes, edges, after, etags = [], [], None, set()
+        with (
+            patch("flowdesk.services.board_graph.PAGE_NODES", 2),
+            patch("flowdesk.services.board_graph.PAGE_EDGES", 2),
+        ):
+            while True:
+                response = self.client.get(url, {"after": after} if after else {})
+                page = json.loads(b"".join(response.streaming_content))
+                self.assertLessEqual(len(page["nodes"]), 2)
+                nodes += [node["id"] for node in page["nodes"]]
+                edges += [(edge["from"], edge["to"]) for edge in page["edges"]]
+                etags.add(response["ETag"])
+                after = page["next"]
+                if after is None:
+                    break
+        self.assertEqual(len(etags), 3)
+        self.assertEqual(nodes, [task.pk for task in tasks])
+        self.assertEqual(len(edges), 4)
+
+        for after in ("x", "-1"):
+            response = self.client.get(url, {"after": after})
+            self.assertEqual(response.status_code, 400)
+
+
+class TestBoardScheduleView(BoardViewTestCase):
+    def test_board_schedule_endpoint(self):
+        first, second = Task.objects.bulk_create(
+            Task(title=f"T{i}", list=self.lists[0], created_by=self.user, position=i)
+            for i in range(2)
+        )
+        second.blocking_tasks.add(first)
+        url = reverse(
+            "flowdesk:board-schedule", args=(self.workspace.pk, self.board.pk)
+        )
+        # session, user, access, tasks and edges
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "order": [first.pk, second.pk],
+                "cyclic": [],
+                "critical_path": {"tasks": [first.pk, second.pk], "weight": 2},
+                "ready": [first.pk],
+            },
+        )
+        response = self.client.get(url, {"weight": "nope"})
+        self.assertEqual(response.status_code, 400)
@@ -22,12 +22,18 @@ from flowdesk.views import (
     ListDeleteView,
     ListOrderUpdate,
     TaskDetailView,
+    TaskCardListView,
     TaskGraphView,
+    TaskGraphDataView,
+    BoardGraphView,
+    BoardGraphDataView,
+    BoardScheduleView,
     TaskCreateView,
     TaskUpdateView,
     TaskDeleteView,
     TaskOrderUpdate,
     CommentCreateView,
+    CommentListView,
 )
 
 app_name = "flowdesk"
@@ -133,6 +139,31 @@ urlpatterns = [
         TaskGraphView.as_view(),
         name="task-graph",
     ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/graph/",
+        BoardGraphView.as_view(),
+        name="board-graph",
+    ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/graph/layout/",
+        BoardGraphDataView.as_view(),
+        name="board-graph-data",
+    ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/graph/<int:root_pk>/",
+        TaskGraphDataView.as_view(),
+        name="task-graph-data",
+    ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/schedule/",
+        BoardScheduleView.as_view(),
+        name="board-schedule",
+    ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/lists/<int:list_pk>/tasks/cards/",
+        TaskCardListView.as_view(),
+        name="task-cards",
+    ),
     path(
         "workspaces/<int:workspace_pk>/boards/<int:board_pk>/lists/<int:list_pk>/tasks/create/",
         TaskCreateView.as_view(),
@@ -153,6 +184,11 @@ urlpatterns = [
         TaskOrderUpdate.as_view(),
         name="update-task-order",
     ),
+    path(
+        "workspaces/<int:workspace_pk>/boards/<int:board_pk>/lists/<int:list_pk>/tasks/<int:task_pk>/comments/",
+        CommentListView.as_view(),
+        name="comment-list",
+    ),
     path(
         "workspaces/<int:workspace_pk>/boards/<int:board_pk>/lists/<int:list_pk>/tasks/<int:task_pk>/comments/create/",
         CommentCreateView.as_view(),
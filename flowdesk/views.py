@@ -1,14 +1,22 @@
 import json
 
-from django.http import HttpRequest, HttpResponse
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.loader import render_to_string
 from django.views import generic
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy, reverse
-from django.db.models import Max, QuerySet
-from django.db import IntegrityError
+from django.db.models import Prefetch, QuerySet
+from django.db import IntegrityError, transaction
 from django.contrib import messages
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth import get_user_model
 
@@ -30,6 +38,7 @@ from flowdesk.forms import (
     CommentForm,
     WorkspaceMemberFormSet,
 )
+from accounts.services.avatar_service import avatar_urls
 from flowdesk.mixins import (
     WorkspaceAccessMixin,
     OwnerRequiredMixin,
@@ -41,7 +50,33 @@ from flowdesk.services.workspace_invite import (
     generate_invite_link,
     workspace_invite_token,
 )
-from flowdesk.services.task_graph import build_task_graph
+from flowdesk.services.graph_cache import get_task_graph, graph_etag
+from flowdesk.services.board_graph import (
+    get_board_layout,
+    iter_layout_json,
+    layout_etag,
+    layout_page,
+)
+from flowdesk.services.schedule import WEIGHTS, build_schedule, load_board_graph
+from flowdesk.services.task_graph import GraphQuery
+from flowdesk.services.comment_stream import (
+    decode_cursor as decode_comment_cursor,
+    load_comments,
+)
+from flowdesk.services.board_snapshot import (
+    build_board_snapshot,
+    decode_cursor,
+    load_list_cards,
+)
+from flowdesk.services.membership_cache import membership_cache
+from flowdesk.services.ordering import (
+    board_order,
+    claim_board_version,
+    move_list,
+    move_task,
+    next_list_position,
+    next_task_position,
+)
 
 User = get_user_model()
 
@@ -66,15 +101,16 @@ class WorkspaceMembersView(
     model = Workspace
     template_name = "flowdesk/workspace_members.html"
 
-    def get_queryset(self):
-        return Workspace.objects.prefetch_related("memberships__user__profile")
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        workspace = self.get_object()
-        context["formset"] = WorkspaceMemberFormSet(
-            queryset=workspace.memberships.all()
+        formset = WorkspaceMemberFormSet(
+            queryset=self.object.memberships.select_related("user__profile")
         )
+        users = [form.instance.user for form in formset]
+        avatars = avatar_urls(users)
+        for user in users:
+            user.avatar_url = avatars.get(user.pk)
+        context["formset"] = formset
         return context
 
     def post(self, request, *args, **kwargs):
@@ -84,7 +120,10 @@ class WorkspaceMembersView(
         )
 
         if formset.is_valid():
-            formset.save()
+            members = formset.save()
+            membership_cache.invalidate_many(
+                (member.user_id, member.workspace_id) for member in members
+            )
             messages.success(request, "Roles updated successfully.")
         else:
             messages.error(request, "There was a problem updating roles.")
@@ -103,10 +142,11 @@ class WorkspaceInviteView(
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        if not self.workspace.memberships.filter(
-            user=self.request.user,
-            role__in=[WorkspaceMember.Roles.OWNER, WorkspaceMember.Roles.ADMIN],
-        ).exists():
+        if (
+            not self.workspace.memberships.filter(user_id=self.request.user.pk)
+            .with_role_at_least(WorkspaceMember.Roles.ADMIN)
+            .exists()
+        ):
             messages.error(
                 self.request, "You do not have permission to generate invites."
             )
@@ -239,10 +279,13 @@ class BoardDetailView(
 ):
     model = Board
 
-    def get_queryset(self) -> QuerySet:
-        return Board.objects.prefetch_related("lists__tasks").select_related(
-            "workspace"
-        )
+    def get_object(self, queryset=None):
+        return self.board
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["lists"] = build_board_snapshot(self.object)
+        return context
 
 
 class BoardCreateView(
@@ -295,8 +338,7 @@ class ListCreateView(
 
     def form_valid(self, form: ListForm) -> HttpResponse:
         form.instance.board = self.board
-        last_position = self.board.lists.aggregate(Max("position"))["position__max"]
-        form.instance.position = (last_position or 0) + 1
+        form.instance.position = next_list_position(self.board.pk)
         return super().form_valid(form)
 
 
@@ -335,18 +377,29 @@ class ListOrderUpdate(
     LoginRequiredMixin, WorkspaceAccessMixin, AdminRequiredMixin, generic.View
 ):
     def post(self, request: HttpRequest, board_pk: int, *args, **kwargs):
-        data = json.loads(request.body)
-        order = data.get("order", [])
-
-        list_ids = [int(item["id"]) for item in order]
-        lists = List.objects.filter(pk__in=list_ids, board_id=board_pk)
-        positions = {int(item["id"]): item["position"] for item in order}
-
-        for lst in lists:
-            lst.position = positions.get(lst.id, lst.position)
-
-        List.objects.bulk_update(objs=lists, fields=["position"])
-        return HttpResponse(status=204)
+        try:
+            data = json.loads(request.body)
+            list_id = int(data["list"])
+            version = int(data["version"])
+            neighbour_ids = {
+                key: int(data[key]) for key in ("before", "after") if data.get(key)
+            }
+        except (ValueError, TypeError, KeyError):
+            return HttpResponseBadRequest("Invalid move.")
+
+        lists = List.objects.filter(
+            pk__in=[list_id, *neighbour_ids.values()], board_id=board_pk
+        ).only("id", "board_id", "position")
+        lists = {lst.pk: lst for lst in lists}
+        neighbours = {key: lists.get(pk) for key, pk in neighbour_ids.items()}
+        if list_id not in lists or None in neighbours.values():
+            return HttpResponseBadRequest("Unknown list.")
+
+        with transaction.atomic():
+            if not claim_board_version(board_pk, version):
+                return JsonResponse(board_order(board_pk, version), status=409)
+            move_list(lists[list_id], neighbours.get("before"), neighbours.get("after"))
+        return JsonResponse({"version": version + 1})
 
 
 class TaskDetailView(
@@ -357,19 +410,58 @@ class TaskDetailView(
     template_name = "flowdesk/task_detail.html"
 
     def get_queryset(self):
-        return Task.objects.select_related("list", "created_by").prefetch_related(
+        return Task.objects.select_related(
+            "list__board__workspace", "created_by"
+        ).prefetch_related(
             "tags",
             "assigned_to",
-            "blocking_tasks",
-            "comments__created_by",
+            Prefetch(
+                "blocking_tasks",
+                queryset=Task.objects.select_related("list__board__workspace"),
+            ),
         )
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
         context["comment_form"] = CommentForm()
+        context["comments"], context["comments_next"] = load_comments(self.object)
         return context
 
 
+class CommentListView(
+    LoginRequiredMixin, WorkspaceAccessMixin, GuestRequiredMixin, generic.View
+):
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        before = request.GET.get("before")
+        try:
+            before = decode_comment_cursor(before) if before else None
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+        comments, next_cursor = load_comments(self.task, before)
+        html = render_to_string(
+            "includes/comments.html", {"comments": comments}, request=request
+        )
+        return JsonResponse({"html": html, "next": next_cursor})
+
+
+class TaskCardListView(
+    LoginRequiredMixin, WorkspaceAccessMixin, GuestRequiredMixin, generic.View
+):
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        after = request.GET.get("after")
+        try:
+            after = decode_cursor(after) if after else None
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+        cards, next_cursor = load_list_cards(self.list, after)
+        html = render_to_string(
+            "includes/task_cards.html", {"tasks": cards}, request=request
+        )
+        return JsonResponse({"html": html, "next": next_cursor})
+
+
 class TaskCreateView(
     LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.CreateView
 ):
@@ -394,8 +486,7 @@ class TaskCreateView(
     def form_valid(self, form: TaskForm) -> HttpResponse:
         form.instance.list = self.list
         form.instance.created_by = self.request.user
-        last_position = self.list.tasks.aggregate(Max("position"))["position__max"]
-        form.instance.position = (last_position or 0) + 1
+        form.instance.position = next_task_position(self.list.pk)
         return super().form_valid(form)
 
 
@@ -443,21 +534,39 @@ class TaskOrderUpdate(
     LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.View
 ):
     def post(self, request, board_pk, *args, **kwargs):
-        data = json.loads(request.body)
-        moves = data.get("moves", [])
-
-        task_ids = [int(item["id"]) for item in moves]
-        tasks = Task.objects.filter(pk__in=task_ids, list__board_id=board_pk)
-        moves_dict = {int(item["id"]): item for item in moves}
-
-        for task in tasks:
-            move = moves_dict.get(task.pk)
-            if move:
-                task.position = move["position"]
-                task.list_id = move["list"]
-
-        Task.objects.bulk_update(objs=tasks, fields=["position", "list_id"])
-        return HttpResponse(status=204)
+        try:
+            data = json.loads(request.body)
+            task_id = int(data["task"])
+            list_id = int(data["list"])
+            version = int(data["version"])
+            neighbour_ids = {
+                key: int(data[key]) for key in ("before", "after") if data.get(key)
+            }
+        except (ValueError, TypeError, KeyError):
+            return HttpResponseBadRequest("Invalid move.")
+
+        if not List.objects.filter(pk=list_id, board_id=board_pk).exists():
+            return HttpResponseBadRequest("Unknown list.")
+
+        tasks = Task.objects.filter(
+            pk__in=[task_id, *neighbour_ids.values()], list__board_id=board_pk
+        ).only("id", "list_id", "position")
+        tasks = {task.pk: task for task in tasks}
+        neighbours = {key: tasks.get(pk) for key, pk in neighbour_ids.items()}
+        if task_id not in tasks or any(
+            task is None or task.list_id != list_id for task in neighbours.values()
+        ):
+            return HttpResponseBadRequest("Unknown task.")
+
+        task = tasks[task_id]
+        with transaction.atomic():
+            affected = {task.list_id, list_id}
+            if not claim_board_version(board_pk, version, affected):
+                return JsonResponse(
+                    board_order(board_pk, version, affected), status=409
+                )
+            move_task(task, list_id, neighbours.get("before"), neighbours.get("after"))
+        return JsonResponse({"version": version + 1})
 
 
 class TaskGraphView(
@@ -466,25 +575,83 @@ class TaskGraphView(
     model = Task
     template_name = "flowdesk/task_graph.html"
 
-    def get_queryset(self) -> QuerySet:
-        return (
-            Task.objects.filter(list__board=self.board)
-            .select_related("list", "list__board")
-            .prefetch_related("blocking_tasks", "tasks")
-        )
+    def get_object(self, queryset=None):
+        return self.task
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        current_task = self.object
-
-        graph_data = build_task_graph(
-            current_task, self.get_queryset(), self.workspace.pk, self.board.pk
+        context["graph_url"] = reverse(
+            "flowdesk:task-graph-data",
+            args=(self.workspace.pk, self.board.pk, self.task.pk),
         )
-        context["graph_data"] = json.dumps(graph_data)
+        return context
+
+
+class TaskGraphDataView(
+    LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.View
+):
+    def get(self, request: HttpRequest, root_pk: int, *args, **kwargs):
+        try:
+            query = GraphQuery.from_params(request.GET)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid graph query.")
+        # the ETag only depends on the board row the access check loaded
+        etag = graph_etag(self.board, root_pk, query)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(get_task_graph(self.board, root_pk, query))
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class BoardGraphView(
+    LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.TemplateView
+):
+    template_name = "flowdesk/board_graph.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["board"] = self.board
+        context["graph_url"] = reverse(
+            "flowdesk:board-graph-data", args=(self.workspace.pk, self.board.pk)
+        )
         return context
 
 
+class BoardGraphDataView(
+    LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.View
+):
+    def get(self, request: HttpRequest, *args, **kwargs):
+        try:
+            page = int(request.GET.get("after") or 0)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid cursor.")
+        if page < 0:
+            return HttpResponseBadRequest("Invalid cursor.")
+        etag = layout_etag(self.board, page)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            layout = layout_page(get_board_layout(self.board), page)
+            response = StreamingHttpResponse(
+                iter_layout_json(layout), content_type="application/json"
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class BoardScheduleView(
+    LoginRequiredMixin, WorkspaceAccessMixin, GuestRequiredMixin, generic.View
+):
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        weight = request.GET.get("weight", WEIGHTS[0])
+        if weight not in WEIGHTS:
+            return HttpResponseBadRequest("Unknown weight.")
+        schedule = build_schedule(load_board_graph(self.board), weight)
+        return JsonResponse(schedule.as_dict())
+
+
 class CommentCreateView(
     LoginRequiredMixin, WorkspaceAccessMixin, UserRequiredMixin, generic.CreateView
 ):
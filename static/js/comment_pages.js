@@ -0,0 +1,32 @@
+document.addEventListener("DOMContentLoaded", function () {
+    async function loadOlderComments(button) {
+        const listEl = button.parentElement.querySelector(".comment-list");
+        const url = `${button.dataset.url}?before=${encodeURIComponent(button.dataset.next)}`;
+        button.disabled = true;
+
+        try {
+            const response = await fetch(url, { headers: { "Accept": "application/json" } });
+            if (!response.ok) {
+                console.error("Request failed:", response.status, await response.text());
+                button.disabled = false;
+                return;
+            }
+            const data = await response.json();
+            listEl.insertAdjacentHTML("beforeend", data.html);
+
+            if (data.next) {
+                button.dataset.next = data.next;
+                button.disabled = false;
+            } else {
+                button.remove();
+            }
+        } catch (error) {
+            console.error("Network error:", error);
+            button.disabled = false;
+        }
+    }
+
+    document.querySelectorAll(".load-older-comments").forEach(button => {
+        button.addEventListener("click", () => loadOlderComments(button));
+    });
+});
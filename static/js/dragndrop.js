@@ -15,7 +15,31 @@ document.addEventListener("DOMContentLoaded", function () {
     }
     const csrftoken = getCookie("csrftoken");
 
-    async function postData(url, data) {
+    // puts lists and cards back in server order after a rejected move
+    function resync(state) {
+        const container = document.getElementById("lists-scroll");
+        const addList = container.querySelector(".card-list.no-drag");
+        state.lists.forEach(id => {
+            const el = container.querySelector(`.card-list[data-list-id="${id}"]`);
+            if (el) {
+                container.insertBefore(el, addList);
+            }
+        });
+        Object.entries(state.tasks).forEach(([listId, taskIds]) => {
+            const listEl = document.querySelector(`.task-list[data-list-id="${listId}"]`);
+            if (!listEl) {
+                return;
+            }
+            taskIds.forEach(id => {
+                const card = document.querySelector(`.task-item[data-task-id="${id}"]`);
+                if (card) {
+                    listEl.appendChild(card);
+                }
+            });
+        });
+    }
+
+    async function send(url, data, undo) {
         try {
             const response = await fetch(url, {
                 method: "POST",
@@ -23,11 +47,18 @@ document.addEventListener("DOMContentLoaded", function () {
                     "Content-Type": "application/json",
                     "X-CSRFToken": csrftoken
                 },
-                body: JSON.stringify(data)
+                body: JSON.stringify({ ...data, version: window.boardVersion })
             });
-            console.log(response)
 
-            if (!response.ok) {
+            if (response.ok || response.status === 409) {
+                const state = await response.json();
+                window.boardVersion = state.version;
+                if (response.status === 409) {
+                    undo();
+                    resync(state);
+                    document.getElementById("move-rejected").classList.remove("d-none");
+                }
+            } else {
                 console.error("Request failed:", response.status, await response.text());
             }
         } catch (error) {
@@ -35,18 +66,52 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
+    // each move is sent once the previous one is answered, so it carries
+    // the version that answer returned
+    let pending = Promise.resolve();
+
+    function postData(url, data, undo) {
+        pending = pending.then(() => send(url, data, undo));
+        return pending;
+    }
+
+    // where the element being dragged started, to put it back if the
+    // server rejects the move
+    let dragStart = null;
+
+    function rememberStart(evt) {
+        dragStart = { parent: evt.from, next: evt.item.nextElementSibling };
+    }
+
+    function undoMove(item) {
+        const { parent, next } = dragStart;
+        return () => {
+            parent.insertBefore(item, next && next.parentNode === parent ? next : null);
+        };
+    }
+
+    function neighbourId(el, direction, className, key) {
+        let sibling = el[direction];
+        while (sibling && !(sibling.classList.contains(className) && sibling.dataset[key])) {
+            sibling = sibling[direction];
+        }
+        return sibling ? sibling.dataset[key] : null;
+    }
+
     new Sortable(document.getElementById("lists-scroll"), {
         animation: 150,
         handle: ".card-header",
         draggable: ".card-list:not(.no-drag)",
-        onEnd: () => {
-            let order = [];
-            document.querySelectorAll(".card-list:not(.no-drag)").forEach((el, index) => {
-                if (el.dataset.listId) {
-                    order.push({ id: el.dataset.listId, position: index });
-                }
-            });
-            postData(window.updateListOrderUrl, { order });
+        onStart: rememberStart,
+        onEnd: (evt) => {
+            if (evt.oldIndex === evt.newIndex) {
+                return;
+            }
+            postData(window.updateListOrderUrl, {
+                list: evt.item.dataset.listId,
+                before: neighbourId(evt.item, "previousElementSibling", "card-list", "listId"),
+                after: neighbourId(evt.item, "nextElementSibling", "card-list", "listId")
+            }, undoMove(evt.item));
         }
     });
 
@@ -55,19 +120,19 @@ document.addEventListener("DOMContentLoaded", function () {
             group: "tasks",
             animation: 150,
             draggable: ".task-item",
-            onEnd: () => {
-                let moves = [];
-                document.querySelectorAll(".task-list").forEach(listEl => {
-                    let listId = listEl.dataset.listId;
-                    listEl.querySelectorAll(".task-item").forEach((taskEl, index) => {
-                        moves.push({
-                            id: taskEl.dataset.taskId,
-                            list: listId,
-                            position: index
-                        });
-                    });
-                });
-                postData(window.updateTaskOrderUrl, { moves });
+            onStart: rememberStart,
+            onEnd: (evt) => {
+                if (evt.from === evt.to && evt.oldIndex === evt.newIndex) {
+                    return;
+                }
+                // only the moved card and its new neighbours are sent, so
+                // partially loaded lists need no special handling
+                postData(window.updateTaskOrderUrl, {
+                    task: evt.item.dataset.taskId,
+                    list: evt.to.dataset.listId,
+                    before: neighbourId(evt.item, "previousElementSibling", "task-item", "taskId"),
+                    after: neighbourId(evt.item, "nextElementSibling", "task-item", "taskId")
+                }, undoMove(evt.item));
             }
         });
     });
@@ -86,15 +86,68 @@ const options = {
     physics: false
 };
 
+if (typeof presetLayout !== "undefined" && presetLayout) {
+    options.layout = { hierarchical: { enabled: false } };
+}
+
 const container = document.getElementById('graph');
-const network = new vis.Network(container, graphData, options);
 
-network.on("click", function (params) {
-    if (params.nodes.length > 0) {
-        const nodeId = params.nodes[0];
-        const node = graphData.nodes.find(n => n.id === nodeId);
-        if (node && node.url) {
-            window.location.href = node.url;
+const nodes = new vis.DataSet();
+const edges = new vis.DataSet();
+const frontier = new Set();
+const moreButton = document.getElementById('graph-more');
+let nextUrl = null;
+
+// frontier nodes have neighbours past the depth limit; clicking one loads
+// the graph around it instead of opening the task
+function load(url) {
+    return fetch(url, { headers: { "Accept": "application/json" } })
+        .then(response => response.json())
+        .then(graphData => {
+            (graphData.frontier || []).forEach(id => frontier.add(id));
+            nodes.update(graphData.nodes.map(node => Object.assign(node, {
+                shapeProperties: { borderDashes: frontier.has(node.id) ? [4, 4] : false }
+            })));
+            edges.update(graphData.edges.map(edge => Object.assign(edge, {
+                id: `${edge.from}-${edge.to}`
+            })));
+            if (graphData.next) {
+                const next = new URL(url, window.location.href);
+                next.searchParams.set('after', graphData.next);
+                nextUrl = next.toString();
+            } else {
+                nextUrl = null;
+            }
+            if (moreButton) {
+                moreButton.classList.toggle('d-none', !nextUrl);
+            }
+        });
+}
+
+function expand(nodeId) {
+    frontier.delete(nodeId);
+    nodes.update({ id: nodeId, shapeProperties: { borderDashes: false } });
+    return load(graphUrl.replace(/\d+\/$/, `${nodeId}/`));
+}
+
+load(graphUrl).then(() => {
+    const network = new vis.Network(container, { nodes, edges }, options);
+
+    network.on("click", function (params) {
+        if (params.nodes.length > 0) {
+            const nodeId = params.nodes[0];
+            if (frontier.has(nodeId)) {
+                expand(nodeId);
+                return;
+            }
+            const node = nodes.get(nodeId);
+            if (node && node.url) {
+                window.location.href = node.url;
+            }
         }
-    }
+    });
 });
+
+if (moreButton) {
+    moreButton.addEventListener('click', () => nextUrl && load(nextUrl));
+}
@@ -0,0 +1,40 @@
+document.addEventListener("DOMContentLoaded", function () {
+    async function loadNextPage(button) {
+        const listEl = button.closest(".card-list").querySelector(".task-list");
+        const url = `${button.dataset.url}?after=${encodeURIComponent(button.dataset.next)}`;
+        button.disabled = true;
+
+        try {
+            const response = await fetch(url, { headers: { "Accept": "application/json" } });
+            if (!response.ok) {
+                console.error("Request failed:", response.status, await response.text());
+                button.disabled = false;
+                return;
+            }
+            const data = await response.json();
+
+            // cards dragged in from other lists may already be on the page
+            const page = document.createElement("template");
+            page.innerHTML = data.html;
+            page.content.querySelectorAll(".task-item").forEach(card => {
+                if (!document.querySelector(`.task-item[data-task-id="${card.dataset.taskId}"]`)) {
+                    listEl.appendChild(card);
+                }
+            });
+
+            if (data.next) {
+                button.dataset.next = data.next;
+                button.disabled = false;
+            } else {
+                button.remove();
+            }
+        } catch (error) {
+            console.error("Network error:", error);
+            button.disabled = false;
+        }
+    }
+
+    document.querySelectorAll(".load-more-tasks").forEach(button => {
+        button.addEventListener("click", () => loadNextPage(button));
+    });
+});